@@ -6,53 +6,152 @@ from GameResources import *
 digits = '123456789'
 rows = 'ABCDEFGHI'
 
+#Size of the tile drawn behind each box, and where its digit sits on it
+TILE_SIZE = 45, 40
+TEXT_OFFSET = 17, 4
+SOLVED_COLOR = (2, 204, 186)
+UNSOLVED_COLOR = (255, 255, 255)
 
-def play(values_list):
-    pygame.init()
 
+def cell_position(x, y):
+    """The top left corner of the tile for the box in column x and row y."""
+    if x in (0, 1, 2):  startX = (x * 57) + 38
+    if x in (3, 4, 5):  startX = (x * 57) + 99
+    if x in (6, 7, 8):  startX = (x * 57) + 159
+
+    if y in (0, 1, 2):  startY = (y * 57) + 35
+    if y in (3, 4, 5):  startY = (y * 57) + 100
+    if y in (6, 7, 8):  startY = (y * 57) + 165
+    return startX, startY
+
+#The box name, tile rectangle and digit position of each box, in board order
+cells = []
+for y in range(9):
+    for x in range(9):
+        startX, startY = cell_position(x, y)
+        cells.append((rows[y] + digits[x], pygame.Rect((startX, startY) + TILE_SIZE),
+                      (startX + TEXT_OFFSET[0], startY + TEXT_OFFSET[1])))
+
+
+class Renderer:
+    """
+    Draw puzzles onto a screen, redrawing only the boxes that changed.
+    Args:
+        screen(Surface): the surface to draw on.
+        background(Surface): the empty board, drawn once and then used to
+            clear each box before it is redrawn.
+
+    The font is loaded, and the tiles and digits rendered, once when the
+    renderer is made, so a frame costs only a few blits per changed box.
+    """
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        font = pygame.font.SysFont('opensans', 21)
+        self.glyphs = dict((digit, font.render(digit, 1, (255, 255, 255))) for digit in digits)
+        self.tiles = {True: self.tile(SOLVED_COLOR), False: self.tile(UNSOLVED_COLOR)}
+        #The digit shown in each box, '' for unsolved, None before the first frame
+        self.shown = [None] * len(cells)
+
+    def tile(self, color):
+        tile = pygame.Surface(TILE_SIZE, pygame.SRCALPHA)
+        SudokuSquare.AAfilledRoundedRect(tile, (0, 0) + TILE_SIZE, color)
+        return tile
+
+    def draw(self, values):
+        """
+        Draw a puzzle dictionary, returning the list of rectangles changed
+        since the last puzzle drawn, to pass to pygame.display.update.
+        """
+        if self.shown[0] is None:
+            self.screen.blit(self.background, (0, 0))
+        dirty = []
+        for i, (box, rect, textpos) in enumerate(cells):
+            value = values[box]
+            digit = value if len(value) == 1 and value != '.' else ''
+            if digit == self.shown[i]:
+                continue
+            self.shown[i] = digit
+            self.screen.blit(self.background, rect, rect)
+            self.screen.blit(self.tiles[digit != ''], rect)
+            if digit:
+                self.screen.blit(self.glyphs[digit], self.glyphs[digit].get_rect().move(textpos))
+            dirty.append(rect)
+        if len(dirty) == len(cells):
+            return [self.screen.get_rect()]
+        return dirty
+
+
+def export_gif(surfaces, path, fps):
+    """
+    Write a sequence of surfaces to an animated GIF, converting each as it
+    comes. Returns the number of frames written. Requires Pillow.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ImportError("Writing a GIF requires Pillow, write frames as images with a %d pattern instead")
+    count = 0
+    def images():
+        nonlocal count
+        for surface in surfaces:
+            count += 1
+            yield Image.frombytes('RGB', surface.get_size(), pygame.image.tostring(surface, 'RGB'))
+    frames = images()
+    first = next(frames, None)
+    if first is not None:
+        first.save(path, save_all=True, append_images=frames, duration=int(1000 / fps), loop=0)
+    return count
+
+def play(values_list, headless=False, output=None, fps=5):
+    """
+    Replay a sequence of puzzle dictionaries on the board.
+    Args:
+        values_list: an iterable of puzzles, each drawn before the next is
+            taken, so a generator can yield the same dictionary every time.
+        headless(bool): draw without opening a window, using SDL's dummy
+            video driver, as fast as the frames come rather than fps.
+        output(string): optionally export every frame, as numbered images
+            for a path with a %d pattern such as 'frames/%05d.png', or as an
+            animation for a path ending in '.gif'.
+        fps(int): frames per second shown in the window, and of a GIF.
+    Returns:
+        the number of frames drawn, once headless replay is done. A window
+        is left showing until it is closed.
+    """
+    if headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    pygame.init()
 
     size = width, height = 700, 700
     screen = pygame.display.set_mode(size)
 
     background_image = pygame.image.load("./images/sudoku-board-bare.jpg").convert()
+    renderer = Renderer(screen, background_image)
 
     clock = pygame.time.Clock()
 
-    # The puzzleNumber sets a seed so either generate
-    # a random number to fill in here or accept user
-    # input for a duplicatable puzzle.
-
-    for values in values_list:
-        pygame.event.pump()
-        theSquares = []
-        initXLoc = 0
-        initYLoc = 0
-        startX, startY, editable, number = 0, 0, "N", 0
-        for y in range(9):
-            for x in range(9):
-                if x in (0, 1, 2):  startX = (x * 57) + 38
-                if x in (3, 4, 5):  startX = (x * 57) + 99
-                if x in (6, 7, 8):  startX = (x * 57) + 159
-
-                if y in (0, 1, 2):  startY = (y * 57) + 35
-                if y in (3, 4, 5):  startY = (y * 57) + 100
-                if y in (6, 7, 8):  startY = (y * 57) + 165
-                col = digits[x]
-                row = rows[y]
-                string_number = values[row + col]
-                if len(string_number) > 1 or string_number == '' or string_number == '.':
-                    number = None
-                else:
-                    number = int(string_number)
-                theSquares.append(SudokuSquare.SudokuSquare(number, startX, startY, editable, x, y))
-
-        screen.blit(background_image, (0, 0))
-        for num in theSquares:
-            num.draw()
-
-        pygame.display.flip()
-        pygame.display.update()
-        clock.tick(5)
+    def frames():
+        for values in values_list:
+            pygame.event.pump()
+            dirty = renderer.draw(values)
+            if not headless:
+                pygame.display.update(dirty)
+                clock.tick(fps)
+            yield screen
+
+    count = 0
+    if output is not None and output.lower().endswith('.gif'):
+        count = export_gif(frames(), output, fps)
+    else:
+        for surface in frames():
+            if output is not None:
+                pygame.image.save(surface, output % count)
+            count += 1
+
+    if headless:
+        pygame.quit()
+        return count
 
     # leave game showing until closed by user
     while True:
@@ -63,4 +162,4 @@ def play(values_list):
 
 if __name__ == "__main__":
     main()
-    sys.exit()
\ No newline at end of file
+    sys.exit()
@@ -0,0 +1,39 @@
+import os
+import shutil
+import tempfile
+
+import solution
+import solution_test
+import unittest
+
+try:
+    import PySudoku
+except ImportError:
+    PySudoku = None
+
+
+@unittest.skipIf(PySudoku is None, "pygame is not installed")
+class TestRenderer(solution_test.DiagonalPuzzle, unittest.TestCase):
+
+    def setUp(self):
+        PySudoku.pygame.init()
+        self.addCleanup(PySudoku.pygame.quit)
+
+    def test_redraws_changed_boxes(self):
+        screen = PySudoku.pygame.Surface((700, 700))
+        renderer = PySudoku.Renderer(screen, PySudoku.pygame.Surface((700, 700)))
+        values = solution.grid_values(self.diagonal_grid)
+        self.assertEqual(renderer.draw(values), [screen.get_rect()])
+        self.assertEqual(renderer.draw(values), [])
+        values['A1'] = '3'
+        self.assertEqual(renderer.draw(values), [PySudoku.cells[0][1]])
+
+    def test_play_headless(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        frames = [solution.grid_values(self.diagonal_grid), self.solved_diag_sudoku]
+        self.assertEqual(PySudoku.play(frames, headless=True, output=os.path.join(directory, '%05d.png')), 2)
+        self.assertEqual(sorted(os.listdir(directory)), ['00000.png', '00001.png'])
+
+if __name__ == '__main__':
+    unittest.main()
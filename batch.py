@@ -0,0 +1,146 @@
+"""
+Solve puzzles in bulk, one 81 character puzzle per line, spread across a
+pool of worker processes.
+
+Run with: python batch.py [puzzles.txt] [-p processes] [--unordered] [--cache solutions.db]
+Each result is written as a tab separated line of the input line number,
+the status and the solved grid.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+from collections import deque, namedtuple
+from functools import partial
+from itertools import islice
+
+from utils import boxes
+import cache
+import solution
+
+SOLVED = 'solved'
+UNSOLVABLE = 'unsolvable'
+INVALID = 'invalid'
+BUDGET_EXCEEDED = solution.BUDGET_EXCEEDED
+
+#Characters allowed in a puzzle line, '0' is read as an unknown box
+GRID_CHARS = frozenset('.0123456789')
+
+Result = namedtuple('Result', ['index', 'status', 'solution'])
+
+#The SolutionCache of each worker process, keyed by its database path and
+#the options it solves with
+caches = {}
+
+def shared_cache(path, options):
+    """
+    Return this process's SolutionCache for a database file and solve
+    options, opening it on first use.
+    """
+    key = (path, repr(sorted(options.items())))
+    if key not in caches:
+        caches[key] = cache.SolutionCache(path=path, **options)
+    return caches[key]
+
+def parse_line(line):
+    """
+    Check a line holds a single puzzle and return it in the form solve expects,
+    or None if it is not a valid puzzle.
+    """
+    grid = line.strip()
+    if len(grid) != 81 or not GRID_CHARS.issuperset(grid):
+        return None
+    return grid.replace('0', '.')
+
+def solve_line(item, options=None, cache_path=None):
+    """
+    Solve one (index, line) pair, returning a Result whose solution is the
+    solved 81 character grid, or None unless the status is SOLVED. Puzzles go
+    through the solution cache stored at cache_path if one is given. With a
+    max_nodes or deadline option the status may be BUDGET_EXCEEDED.
+    """
+    index, line = item
+    grid = parse_line(line)
+    if grid is None:
+        return Result(index, INVALID, None)
+    if cache_path is not None:
+        values = shared_cache(cache_path, options or {}).solve(grid)
+    else:
+        values = solution.solve(grid, **(options or {}))
+    if isinstance(values, solution.SolveResult):
+        if values.status == solution.BUDGET_EXCEEDED:
+            return Result(index, BUDGET_EXCEEDED, None)
+        values = values.values
+    if not values:
+        return Result(index, UNSOLVABLE, None)
+    return Result(index, SOLVED, ''.join(values[box] for box in boxes))
+
+def solve_many(lines, processes=None, chunksize=64, ordered=True, cache_path=None, **options):
+    """
+    Solve an iterable of puzzle lines, yielding a Result for each non-blank
+    line as it is solved.
+    Args:
+        lines: an iterable of 81 character puzzle strings, such as an open file.
+        processes(int): the number of worker processes, None for one per CPU
+            or 1 to solve in this process without a pool.
+        chunksize(int): the number of puzzles sent to a worker at a time.
+        ordered(bool): yield results in input order, or as soon as each chunk
+            is finished if False.
+        cache_path(string): a sqlite file of solutions shared by every worker,
+            see cache.SolutionCache, or None to solve every puzzle.
+        options: keyword arguments passed on to solution.solve. The
+            parallel engine can only be used with processes=1, and a
+            max_nodes or deadline budget applies to each puzzle.
+
+    Lines are read a window at a time, with at most two windows handed to the
+    pool at once, so memory use stays flat however long the input is.
+    """
+    if options.get('engine') == 'parallel' and processes != 1:
+        raise ValueError("The parallel engine runs its own pool, use it with processes=1")
+    items = ((index, line) for index, line in enumerate(lines) if line.strip())
+    worker = partial(solve_line, options=options, cache_path=cache_path)
+    if processes == 1:
+        for item in items:
+            yield worker(item)
+        return
+    processes = processes or os.cpu_count() or 1
+    window = chunksize * processes * 4
+    with multiprocessing.Pool(processes) as pool:
+        mapper = pool.imap if ordered else pool.imap_unordered
+        pending = deque()
+        while True:
+            batch = list(islice(items, window))
+            if batch:
+                pending.append(mapper(worker, batch, chunksize))
+            if not pending:
+                break
+            #Keep the next window queued while this one is drained
+            if len(pending) > 1 or not batch:
+                for result in pending.popleft():
+                    yield result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve diagonal sudoku puzzles in bulk, one per line.')
+    parser.add_argument('input', nargs='?', default='-', help='puzzle file, or - for stdin')
+    parser.add_argument('-p', '--processes', type=int, default=None, help='worker processes, default one per CPU')
+    parser.add_argument('--chunksize', type=int, default=64, help='puzzles sent to a worker at a time')
+    parser.add_argument('--unordered', action='store_true', help='write results as they finish')
+    parser.add_argument('--engine', default='string', help='engine passed to solve')
+    parser.add_argument('--propagation', default='sweep', help='propagation passed to solve')
+    parser.add_argument('--backtracking', default='copy', help='backtracking passed to solve')
+    parser.add_argument('--cache', default=None, help='sqlite file of solutions shared across workers and runs')
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    options = {'engine': args.engine}
+    if args.engine == 'string':
+        options.update(propagation=args.propagation, backtracking=args.backtracking)
+    try:
+        for result in solve_many(source, args.processes, args.chunksize, not args.unordered, args.cache, **options):
+            sys.stdout.write('%d\t%s\t%s\n' % (result.index, result.status, result.solution or ''))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+if __name__ == '__main__':
+    main()
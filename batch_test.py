@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+
+import batch
+import benchmark
+import solution_test
+import unittest
+
+
+class TestSolveMany(solution_test.DiagonalPuzzle, unittest.TestCase):
+    lines = [solution_test.DiagonalPuzzle.diagonal_grid + '\n', 'not a puzzle\n', '\n', '11' + '.' * 79 + '\n',
+             solution_test.DiagonalPuzzle.diagonal_grid.replace('.', '0')]
+
+    def check(self, results):
+        self.assertEqual(sorted(results), [
+            (0, batch.SOLVED, self.solved_grid),
+            (1, batch.INVALID, None),
+            (3, batch.UNSOLVABLE, None),
+            (4, batch.SOLVED, self.solved_grid),
+        ])
+
+    def test_in_process(self):
+        self.check(list(batch.solve_many(self.lines, processes=1)))
+
+    def test_pool_ordered(self):
+        results = list(batch.solve_many(self.lines, processes=2, chunksize=1, engine='bitmask'))
+        self.assertEqual([r.index for r in results], [0, 1, 3, 4])
+        self.check(results)
+
+    def test_pool_unordered(self):
+        self.check(list(batch.solve_many(self.lines, processes=2, chunksize=1, ordered=False, engine='bitmask')))
+
+    def test_parallel_engine_needs_one_process(self):
+        with self.assertRaises(ValueError):
+            list(batch.solve_many(self.lines, processes=2, engine='parallel'))
+        self.check(list(batch.solve_many(self.lines, processes=1, engine='parallel')))
+
+    def test_budget(self):
+        hard_grid = benchmark.load_puzzles('hard.txt')[0]
+        self.check(list(batch.solve_many(self.lines, processes=1, max_nodes=1000)))
+        self.assertEqual(list(batch.solve_many([hard_grid], processes=1, max_nodes=1)),
+                         [(0, batch.BUDGET_EXCEEDED, None)])
+
+    def test_pool_shared_cache(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'solutions.db')
+            self.check(list(batch.solve_many(self.lines, processes=2, chunksize=1, cache_path=path, engine='bitmask')))
+            self.check(list(batch.solve_many(self.lines, processes=1, cache_path=path, engine='bitmask')))
+            shared = batch.shared_cache(path, {'engine': 'bitmask'})
+            self.assertEqual(shared.misses, 0)
+            #Different options get a cache of their own
+            self.assertIsNot(batch.shared_cache(path, {'engine': 'dlx'}), shared)
+        finally:
+            for shared in batch.caches.values():
+                shared.close()
+            batch.caches.clear()
+            shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    unittest.main()
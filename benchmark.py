@@ -0,0 +1,416 @@
+"""
+Compare the solving engines on the solution_test.py puzzles and on the
+puzzle corpora in the puzzles directory.
+
+Run with: python benchmark.py
+
+The regression suite times solve and each strategy in isolation on every
+corpus, writes the results as JSON and fails if any case is slower or uses
+more memory than a stored baseline by more than a tolerance:
+
+    python benchmark.py --suite --output results.json --check
+    python benchmark.py --suite --update-baseline
+
+Baselines are only comparable on the machine they were recorded on.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from functools import partial
+
+import bitmask
+import cache
+import generator
+import geometry
+import heuristics
+import parallel
+import solution
+import solution_test
+import strategies
+import vectorized
+from stats import SolveStats
+
+PUZZLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzles')
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+def load_puzzles(name):
+    """Read one 81 character puzzle per line from a file in the puzzles directory."""
+    with open(os.path.join(PUZZLE_DIR, name)) as f:
+        return [line.strip() for line in f if line.strip()]
+
+def time_solve(puzzles, options, repeat=1):
+    """
+    Solve every puzzle passing the given keyword options to solve, returning
+    the best total time in seconds over the number of repeats.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for grid in puzzles:
+            solution.solve(grid, **options)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+#Solver configurations to compare, as a label and the options passed to solve
+CONFIGURATIONS = [
+    ('string', {'engine': 'string'}),
+    ('worklist', {'engine': 'string', 'propagation': 'worklist'}),
+    ('trail', {'engine': 'string', 'backtracking': 'trail'}),
+    ('bitmask', {'engine': 'bitmask'}),
+    ('dlx', {'engine': 'dlx'}),
+]
+
+def compare(name, puzzles, configurations=CONFIGURATIONS, repeat=1):
+    """Print the time taken by each configuration on a set of puzzles and the speedup over the first."""
+    times = [time_solve(puzzles, options, repeat) for label, options in configurations]
+    print('%s (%d puzzles)' % (name, len(puzzles)))
+    for (label, options), t in zip(configurations, times):
+        print('  %-8s %9.2f ms  %6.1fx' % (label, t * 1000, times[0] / t))
+
+def count_nodes(puzzles, options):
+    """
+    The search nodes visited solving every puzzle with the given keyword
+    options, counted on a SolveStats in a separate pass from the timing.
+    """
+    nodes = 0
+    for grid in puzzles:
+        stats = SolveStats()
+        solution.solve(grid, stats=stats, **options)
+        nodes += stats.nodes
+    return nodes
+
+def peak_memory(puzzles, run, setup=None):
+    """
+    The most memory allocated by run on any one puzzle, passed through setup
+    first if given. Memory is traced in a separate pass from the timing, as
+    tracing slows the solver down.
+    """
+    peak = 0
+    for grid in puzzles:
+        arg = setup(grid) if setup else grid
+        tracemalloc.start()
+        run(arg)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak
+
+#Search strategies to profile, as a label and the options passed to solve
+SEARCHES = [
+    ('copy', {'engine': 'string', 'propagation': 'worklist'}),
+    ('trail', {'engine': 'string', 'backtracking': 'trail'}),
+]
+
+def profile_search(name, puzzles, searches=SEARCHES):
+    """
+    Print the search nodes visited per second and the peak memory allocated
+    while solving each set of puzzles, for each search strategy.
+    """
+    print('%s (%d puzzles)' % (name, len(puzzles)))
+    for label, options in searches:
+        nodes = count_nodes(puzzles, options)
+        elapsed = time_solve(puzzles, options)
+        peak = peak_memory(puzzles, partial(solution.solve, **options))
+        print('  %-8s %8d nodes %10.0f nodes/s %9.1f KiB peak' % (label, nodes, nodes / elapsed, peak / 1024.0))
+
+#Strategy lists for reduce_puzzle to compare, None being eliminate,
+#only_choice and naked_twins
+STRATEGY_SETS = [
+    ('default', None),
+    ('intersections', strategies.by_name(['eliminate', 'only_choice', 'intersections'])),
+    ('pairs', strategies.by_name(['eliminate', 'only_choice', 'intersections', 'naked_pairs', 'hidden_pairs'])),
+    ('advanced', strategies.ADVANCED),
+]
+
+def compare_strategies(name, puzzles, strategy_sets=STRATEGY_SETS):
+    """Print the search nodes and time taken by the sweep search with each list of strategies."""
+    print('%s (%d puzzles)' % (name, len(puzzles)))
+    times = []
+    for label, chosen in strategy_sets:
+        nodes = count_nodes(puzzles, {'strategies': chosen})
+        times.append(time_solve(puzzles, {'strategies': chosen}))
+        print('  %-14s %6d nodes %9.2f ms  %6.1fx' % (label, nodes, times[-1] * 1000, times[0] / times[-1]))
+
+def compare_heuristics(name, puzzles, branching=sorted(heuristics.BRANCHING), value_orders=(None, 'lcv')):
+    """
+    Print the search nodes and time taken by the worklist search with each
+    pairing of branching heuristic and value ordering from heuristics.py.
+    """
+    print('%s (%d puzzles)' % (name, len(puzzles)))
+    for branch_name in branching:
+        for order_name in value_orders:
+            options = {'propagation': 'worklist', 'branching': heuristics.BRANCHING[branch_name],
+                       'value_order': heuristics.VALUE_ORDERS.get(order_name)}
+            nodes = count_nodes(puzzles, options)
+            t = time_solve(puzzles, options)
+            print('  %-22s %-5s %7d nodes %9.2f ms' % (branch_name, order_name or '', nodes, t * 1000))
+
+def compare_batch(name, puzzles, repeat=1):
+    """
+    Print puzzles solved per second by the vectorized batch engine against
+    solving one at a time with the bitmask engine.
+    """
+    print('%s (%d puzzles)' % (name, len(puzzles)))
+    if vectorized.np is None:
+        print('  skipped, numpy is not installed')
+        return
+    one_at_a_time = time_solve(puzzles, {'engine': 'bitmask'}, repeat)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        vectorized.solve_batch(puzzles)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    print('  %-10s %10.0f puzzles/s' % ('bitmask', len(puzzles) / one_at_a_time))
+    print('  %-10s %10.0f puzzles/s  %6.1fx' % ('vectorized', len(puzzles) / best, one_at_a_time / best))
+
+def compare_parallel(name, puzzles, processes=None):
+    """
+    Print the median and worst solve time of the bitmask engine against
+    parallel search of each puzzle on one pool, which only helps where
+    several cores are free.
+    """
+    def latencies(solve):
+        times = []
+        for grid in puzzles:
+            start = time.perf_counter()
+            solve(grid)
+            times.append(time.perf_counter() - start)
+        return sorted(times)
+    print('%s (%d puzzles, %d cores)' % (name, len(puzzles), os.cpu_count() or 1))
+    with parallel.ParallelSolver(processes) as solver:
+        for label, solve in (('bitmask', bitmask.solve), ('parallel', solver.solve)):
+            times = latencies(solve)
+            print('  %-8s %9.2f ms median %9.2f ms worst' % (label, percentile(times, 0.5) * 1000, times[-1] * 1000))
+
+def generator_throughput(count=20):
+    """Print puzzles generated per second in this process and across every core."""
+    print('generator (%d puzzles, %d cores)' % (count, os.cpu_count() or 1))
+    for label, processes in (('1 process', 1), ('pool', None)):
+        start = time.perf_counter()
+        for batch in generator.generate_many(count, processes=processes):
+            pass
+        print('  %-10s %8.2f puzzles/s' % (label, count / (time.perf_counter() - start)))
+
+def size_puzzles(n, count, blank=0.5, seed=0):
+    """
+    Make puzzles for the board of n x n squares by relabelling the digits of
+    one full grid at random and blanking a fraction of its boxes. Each has
+    at least one solution, though not necessarily only one.
+    """
+    board = geometry.board(n)
+    full = bitmask.search(board.grid_masks('.' * board.cells), board)
+    full = board.masks_grid(full)
+    rng = random.Random(seed)
+    puzzles = []
+    for _ in range(count):
+        relabel = list(board.digits)
+        rng.shuffle(relabel)
+        relabel = dict(zip(board.digits, relabel))
+        grid = [relabel[d] for d in full]
+        for i in rng.sample(range(board.cells), int(blank * board.cells)):
+            grid[i] = '.'
+        puzzles.append(''.join(grid))
+    return puzzles
+
+def compare_sizes(sizes=(3, 4, 5), count=5):
+    """Print how the bitmask engine's solve time scales with the size of the board."""
+    print('board sizes (%d puzzles each, 50%% blank)' % count)
+    for n in sizes:
+        puzzles = size_puzzles(n, count)
+        t = time_solve(puzzles, {'engine': 'bitmask'})
+        print('  %2dx%-2d %9.2f ms per puzzle' % (n * n, n * n, t * 1000 / count))
+
+def compare_cache(name, puzzles, variants=10, options={'engine': 'string', 'propagation': 'worklist'}, seed=0):
+    """
+    Print the time to solve a stream of random symmetries of each puzzle
+    directly and through a SolutionCache, with the hit rate and the cost of
+    canonicalizing against solving.
+    """
+    rng = random.Random(seed)
+    stream = [cache.symmetry(grid, rng.randrange(len(cache.transforms)), ''.join(rng.sample(cache.digits, 9)))
+              for grid in puzzles for _ in range(variants)]
+    rng.shuffle(stream)
+    direct = time_solve(stream, options)
+    solutions = cache.SolutionCache(**options)
+    start = time.perf_counter()
+    for grid in stream:
+        solutions.solve(grid)
+    cached = time.perf_counter() - start
+    info = solutions.info()
+    print('%s (%d puzzles, %d symmetries of each)' % (name, len(puzzles), variants))
+    print('  %-8s %9.2f ms' % ('direct', direct * 1000))
+    print('  %-8s %9.2f ms  %6.1fx  %3.0f%% hits  %.2f ms to canonicalize, %.2f ms to solve'
+          % ('cached', cached * 1000, direct / cached, info['hit_rate'] * 100,
+             info['canonical_seconds'] * 1000, info['solve_seconds'] * 1000))
+
+#Difficulty buckets, each a file of puzzles in the puzzles directory
+CORPORA = ['easy', 'hard', 'hardest', 'unsolvable']
+
+#Strategies from solution.py timed on their own, each given a fresh puzzle
+#from grid_values
+STRATEGIES = [
+    ('eliminate', solution.eliminate),
+    ('only_choice', solution.only_choice),
+    ('naked_twins', solution.naked_twins),
+    ('reduce_puzzle', solution.reduce_puzzle),
+    ('search', solution.search),
+]
+
+#Solve configurations run by the suite. The sweeping string engine is left
+#out, as the search case already times it
+SUITE_CONFIGURATIONS = [c for c in CONFIGURATIONS if c[0] != 'string']
+
+#Metrics checked against the baseline, with the smallest change counted as
+#a regression so timer noise on very fast cases is ignored
+CHECKED_METRICS = {'median_ms': 0.05, 'p99_ms': 0.5, 'peak_kib': 4.0}
+
+def percentile(ordered, fraction):
+    """The nearest rank percentile of an ordered list, fraction between 0 and 1."""
+    rank = max(0, min(len(ordered) - 1, int(math.ceil(fraction * len(ordered))) - 1))
+    return ordered[rank]
+
+def measure(puzzles, run, setup=None, repeat=3):
+    """
+    Time run on each puzzle, first passing the puzzle through setup if given
+    so that setup is not timed.
+    Returns:
+        a dictionary of the number of puzzles, the median and 99th percentile
+        latency, puzzles per second and the peak memory allocated by a run.
+
+    As with timeit, garbage collection is paused while timing and the best of
+    repeat runs is kept for each puzzle, so the figures are stable enough to
+    compare against a baseline.
+    """
+    times = []
+    for grid in puzzles:
+        best = None
+        for _ in range(repeat):
+            arg = setup(grid) if setup else grid
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                run(arg)
+                elapsed = time.perf_counter() - start
+            finally:
+                gc.enable()
+            if best is None or elapsed < best:
+                best = elapsed
+        times.append(best)
+    peak = peak_memory(puzzles, run, setup)
+    total = sum(times)
+    times.sort()
+    return {
+        'puzzles': len(puzzles),
+        'median_ms': round(percentile(times, 0.5) * 1000, 4),
+        'p99_ms': round(percentile(times, 0.99) * 1000, 4),
+        'puzzles_per_sec': round(len(puzzles) / total, 1) if total else None,
+        'peak_kib': round(peak / 1024.0, 1),
+    }
+
+def run_suite(limit=None, corpora=CORPORA, configurations=SUITE_CONFIGURATIONS, strategies=STRATEGIES):
+    """
+    Run solve with each configuration, and each strategy in isolation, on the
+    first limit puzzles of every corpus.
+    Returns:
+        a dictionary of metrics keyed by case, such as 'hard/solve/bitmask'
+        or 'easy/naked_twins'.
+    """
+    results = {}
+    for corpus in corpora:
+        puzzles = load_puzzles(corpus + '.txt')[:limit]
+        for label, options in configurations:
+            results['%s/solve/%s' % (corpus, label)] = measure(puzzles, partial(solution.solve, **options))
+        for name, strategy in strategies:
+            results['%s/%s' % (corpus, name)] = measure(puzzles, strategy, solution.grid_values)
+    return results
+
+def check_regressions(results, baseline, tolerance=0.5):
+    """
+    Compare results against a baseline from an earlier run.
+    Returns:
+        a list of messages, one for each metric of a case that is worse than
+        the baseline by more than the tolerance, as a fraction of the baseline.
+    """
+    regressions = []
+    for case, expected in sorted(baseline.items()):
+        if case not in results:
+            continue
+        for metric, noise in sorted(CHECKED_METRICS.items()):
+            limit = expected[metric] * (1 + tolerance) + noise
+            if results[case][metric] > limit:
+                regressions.append('%s %s: %.4g, baseline %.4g' % (case, metric, results[case][metric], expected[metric]))
+    return regressions
+
+def report():
+    """
+    Print the human readable comparison of engines, searches, strategies,
+    heuristics, board sizes, the cache, parallel search and the generator.
+    """
+    compare('solution_test.py', [solution_test.TestDiagonalSudoku.diagonal_grid], repeat=5)
+    compare('puzzles/hard.txt', load_puzzles('hard.txt'))
+    profile_search('puzzles/hard.txt', load_puzzles('hard.txt'))
+    compare_strategies('puzzles/hard.txt', load_puzzles('hard.txt')[:10])
+    compare_heuristics('puzzles/hardest.txt', load_puzzles('hardest.txt'))
+    compare_batch('puzzles/easy.txt x 50', load_puzzles('easy.txt') * 50)
+    compare_batch('puzzles/hard.txt', load_puzzles('hard.txt'))
+    compare_sizes()
+    compare_cache('puzzles/hard.txt', load_puzzles('hard.txt')[:10])
+    compare_parallel('puzzles/hardest.txt', load_puzzles('hardest.txt'))
+    generator_throughput()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the sudoku solver.')
+    parser.add_argument('--suite', action='store_true', help='run the regression suite instead of the engine comparison')
+    parser.add_argument('--limit', type=int, default=10, help='puzzles used from each corpus, 0 for all')
+    parser.add_argument('--output', help='write the suite results to this JSON file')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline JSON file')
+    parser.add_argument('--check', action='store_true', help='fail if the suite regresses against the baseline')
+    parser.add_argument('--update-baseline', action='store_true', help='store the suite results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed slowdown as a fraction of the baseline')
+    args = parser.parse_args(argv)
+
+    if not args.suite:
+        report()
+        return 0
+
+    results = run_suite(args.limit or None)
+    output = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'limit': args.limit,
+        'results': results,
+    }
+    text = json.dumps(output, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            f.write(text + '\n')
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('limit') != args.limit:
+            sys.stderr.write('baseline was recorded with --limit %s\n' % baseline.get('limit'))
+            return 2
+        regressions = check_regressions(results, baseline['results'], args.tolerance)
+        for message in regressions:
+            sys.stderr.write('regression: %s\n' % message)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import benchmark
+import unittest
+
+
+class TestRegressionCheck(unittest.TestCase):
+    baseline = {'hard/solve/bitmask': {'median_ms': 10.0, 'p99_ms': 40.0, 'peak_kib': 100.0}}
+
+    def results(self, **changes):
+        metrics = dict(self.baseline['hard/solve/bitmask'])
+        metrics.update(changes)
+        return {'hard/solve/bitmask': metrics}
+
+    def test_within_tolerance(self):
+        self.assertEqual(benchmark.check_regressions(self.results(median_ms=12.0), self.baseline, 0.25), [])
+
+    def test_regression(self):
+        regressions = benchmark.check_regressions(self.results(p99_ms=80.0), self.baseline, 0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('p99_ms', regressions[0])
+
+    def test_new_cases_ignored(self):
+        self.assertEqual(benchmark.check_regressions({}, self.baseline), [])
+
+    def test_percentile(self):
+        ordered = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(ordered, 0.5), 50)
+        self.assertEqual(benchmark.percentile(ordered, 0.99), 99)
+        self.assertEqual(benchmark.percentile([7], 0.99), 7)
+
+
+class TestMeasure(unittest.TestCase):
+
+    def test_measure(self):
+        puzzles = benchmark.load_puzzles('easy.txt')[:3]
+        metrics = benchmark.measure(puzzles, benchmark.solution.eliminate, benchmark.solution.grid_values)
+        self.assertEqual(metrics['puzzles'], 3)
+        self.assertLessEqual(metrics['median_ms'], metrics['p99_ms'])
+
+    def test_count_nodes(self):
+        puzzles = benchmark.load_puzzles('hard.txt')[:2]
+        counts = [benchmark.count_nodes(puzzles, options) for label, options in benchmark.SEARCHES]
+        self.assertGreater(min(counts), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,233 @@
+"""
+Bitmask candidate engine for the diagonal sudoku solver.
+
+Each box is held as an integer in a flat list indexed by box, where bit d-1
+is set while digit d is still possible. Strategies clear bits in place
+instead of building new strings, and the dictionary form used throughout
+solution.py is only produced at the edges by masks_values.
+
+The strategies take the geometry.Board to work on, the standard 9x9 board
+by default, so the same engine solves 16x16 and 25x25 boards. They test for
+one or two possible digits with bit tricks rather than counting, so nothing
+depends on tables the size of every possible mask.
+"""
+from utils import *
+import geometry
+
+#The standard 9x9 board, whose index tables match utils
+standard = geometry.board(3)
+
+#All nine digits still possible
+ALL_DIGITS = standard.all_digits
+digits = standard.digits
+
+#Index tables for the standard board, matching the string based units and peers in utils
+box_index = standard.box_index
+unit_index = standard.units
+peer_index = standard.peers
+peer_sets = standard.peer_sets
+
+#Lookup tables for every possible mask on the standard board, so popcount
+#and digit conversion are single list lookups
+popcount = [bin(m).count('1') for m in range(ALL_DIGITS + 1)]
+mask_digits = [''.join(d for i, d in enumerate(digits) if m >> i & 1) for m in range(ALL_DIGITS + 1)]
+digit_mask = standard.digit_mask
+
+try:
+    bit_count = int.bit_count
+except AttributeError:
+    def bit_count(m):
+        return bin(m).count('1')
+
+def grid_masks(grid):
+    """
+    Convert an 81 character grid string into a list of candidate masks.
+    Args:
+        grid(string) - A grid in string form, '.' for unknown boxes.
+    Returns:
+        A list of 81 masks, ALL_DIGITS for unknown boxes.
+    """
+    assert len(grid) == 81
+    return [digit_mask.get(c, ALL_DIGITS) for c in grid]
+
+def values_masks(values):
+    """Convert a dictionary of the form {'A1': '123', ...} into a list of masks."""
+    masks = []
+    for box in boxes:
+        mask = 0
+        for d in values[box]:
+            mask |= digit_mask[d]
+        masks.append(mask)
+    return masks
+
+def masks_values(masks):
+    """Convert a list of masks back into the dictionary form used by solution.py."""
+    return dict(zip(boxes, [mask_digits[m] for m in masks]))
+
+def eliminate(masks, board=standard, done=None):
+    """
+    Clear the digit of every solved box from its peers.
+    Returns False if a box is left with no possible digits.
+
+    If done is given it is a list of flags, one per box, marking the solved
+    boxes already cleared from their peers, which are skipped. It is updated
+    with the boxes cleared by this call.
+    """
+    peer_index = board.peers
+    for i, m in enumerate(masks):
+        if not m & (m - 1):
+            if done is not None:
+                if done[i]:
+                    continue
+                done[i] = True
+            keep = ~m
+            for p in peer_index[i]:
+                masks[p] &= keep
+                if not masks[p]:
+                    return False
+    return masks
+
+def only_choice(masks, board=standard):
+    """
+    Assign each digit that has a single possible box within a unit to that box.
+
+    For each unit the digits seen at least once and at least twice are
+    accumulated as masks, so the digits with exactly one place fall out as
+    once & ~twice without looking at each digit in turn.
+    Returns False if a digit has no place left in a unit, or if a box would
+    need to hold two digits at once.
+    """
+    all_digits = board.all_digits
+    for unit in board.units:
+        once = twice = 0
+        for i in unit:
+            m = masks[i]
+            twice |= once & m
+            once |= m
+        if once != all_digits:
+            return False
+        single = once & ~twice
+        if single:
+            for i in unit:
+                hit = masks[i] & single
+                if hit:
+                    if hit & (hit - 1):
+                        return False
+                    masks[i] = hit
+    return masks
+
+def naked_twins(masks, board=standard):
+    """
+    Find pairs of boxes within a unit that share the same two possible digits,
+    and clear those digits from every peer the two boxes have in common.
+    """
+    peer_sets = board.peer_sets
+    for unit in board.units:
+        seen = {}
+        for i in unit:
+            m = masks[i]
+            rest = m & (m - 1)
+            if rest and not rest & (rest - 1):
+                if m in seen:
+                    keep = ~m
+                    for p in peer_sets[i] & peer_sets[seen[m]]:
+                        masks[p] &= keep
+                else:
+                    seen[m] = i
+    return masks
+
+def reduce_puzzle(masks, board=standard):
+    """
+    Repeat each strategy until no candidate is removed.
+
+    Bits are only ever cleared, so the sum of the masks strictly decreases
+    while progress is made and doubles as the stall check. For the same
+    reason a solved box keeps its digit, so it is only cleared from its
+    peers on the first pass after it is solved.
+    """
+    done = [False] * len(masks)
+    total = sum(masks)
+    while True:
+        if eliminate(masks, board, done) is False or only_choice(masks, board) is False:
+            return False
+        naked_twins(masks, board)
+        if 0 in masks:
+            return False
+        after = sum(masks)
+        if after == total:
+            return masks
+        total = after
+
+def choose_box(masks):
+    """The index of the unsolved box with the fewest possible digits, or None if every box is solved."""
+    return min(((bit_count(m), i) for i, m in enumerate(masks) if m & (m - 1)), default=(1, None))[1]
+
+def branches(masks, s):
+    """Copies of the masks with box s set to each of its possible digits in turn."""
+    m = masks[s]
+    children = []
+    while m:
+        bit = m & -m
+        m ^= bit
+        child = masks[:]
+        child[s] = bit
+        children.append(child)
+    return children
+
+def search(masks, board=standard):
+    """
+    Reduce the puzzle, then branch on the unsolved box with the fewest
+    possible digits, trying each digit in turn on a copy of the masks.
+    """
+    masks = reduce_puzzle(masks, board)
+    if masks is False:
+        return False
+    s = choose_box(masks)
+    if s is None:
+        return masks
+    m = masks[s]
+    while m:
+        bit = m & -m
+        m ^= bit
+        new_masks = masks[:]
+        new_masks[s] = bit
+        attempt = search(new_masks, board)
+        if attempt:
+            return attempt
+    return False
+
+def count_solutions(masks, board=standard, limit=None):
+    """
+    Count the solutions of a list of masks, which is reduced in place,
+    stopping once limit solutions are found if limit is not None.
+    """
+    masks = reduce_puzzle(masks, board)
+    if masks is False:
+        return 0
+    s = choose_box(masks)
+    if s is None:
+        return 1
+    count = 0
+    for child in branches(masks, s):
+        count += count_solutions(child, board, None if limit is None else limit - count)
+        if limit is not None and count >= limit:
+            break
+    return count
+
+def solve(grid, board=None):
+    """
+    Find the solution to a Sudoku grid using the bitmask engine.
+    Args:
+        grid(string): a grid in string form, with any character other than a
+            digit of the board for unknown boxes.
+        board(Board): the geometry.Board to solve on, found from the length of
+            the grid if not given.
+    Returns:
+        The dictionary representation of the final sudoku grid. False if no solution exists.
+    """
+    if board is None:
+        board = geometry.board_for_grid(grid)
+    masks = search(board.grid_masks(grid), board)
+    if masks is False:
+        return False
+    return board.masks_values(masks)
@@ -0,0 +1,51 @@
+import bitmask
+import solution
+import solution_test
+import unittest
+
+
+class TestBitmaskConversion(unittest.TestCase):
+
+    def test_round_trip(self):
+        values = solution_test.TestNakedTwins.before_naked_twins_1
+        self.assertEqual(bitmask.masks_values(bitmask.values_masks(values)), values)
+
+    def test_grid_masks(self):
+        masks = bitmask.grid_masks(solution_test.TestDiagonalSudoku.diagonal_grid)
+        self.assertEqual(bitmask.masks_values(masks), solution.grid_values(solution_test.TestDiagonalSudoku.diagonal_grid))
+
+
+class TestBitmaskStrategies(unittest.TestCase):
+
+    def test_naked_twins(self):
+        for before, possible in ((solution_test.TestNakedTwins.before_naked_twins_1, solution_test.TestNakedTwins.possible_solutions_1),
+                                 (solution_test.TestNakedTwins.before_naked_twins_2, solution_test.TestNakedTwins.possible_solutions_2)):
+            masks = bitmask.naked_twins(bitmask.values_masks(before))
+            self.assertIn(bitmask.masks_values(masks), possible)
+
+    def test_only_choice_contradiction(self):
+        #A unit where no box can hold a 1 cannot be completed
+        masks = [bitmask.ALL_DIGITS] * 81
+        for i in bitmask.unit_index[0]:
+            masks[i] = bitmask.ALL_DIGITS & ~1
+        self.assertFalse(bitmask.only_choice(masks))
+
+
+class TestBitmaskSolve(unittest.TestCase):
+
+    def test_solve(self):
+        self.assertEqual(solution.solve(solution_test.TestDiagonalSudoku.diagonal_grid, engine='bitmask'),
+                         solution_test.TestDiagonalSudoku.solved_diag_sudoku)
+
+    def test_unsolvable(self):
+        grid = '11' + '.' * 79
+        self.assertFalse(solution.solve(grid, engine='bitmask'))
+
+    def test_count_solutions(self):
+        grid = solution_test.TestDiagonalSudoku.diagonal_grid
+        self.assertEqual(bitmask.count_solutions(bitmask.grid_masks(grid)), 1)
+        self.assertEqual(bitmask.count_solutions(bitmask.grid_masks('11' + '.' * 79)), 0)
+        self.assertEqual(bitmask.count_solutions(bitmask.grid_masks('.' * 81), limit=5), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,250 @@
+"""
+Solution cache keyed by the canonical form of a puzzle under the symmetries
+of diagonal sudoku.
+
+Two puzzles that differ only by a symmetry have solutions that differ by the
+same symmetry, so each grid is reduced to a canonical representative, the
+solved representative is looked up, and the solution is mapped back. The
+symmetries used are the ones that keep both diagonals as units:
+
+- the 8 rotations and reflections of the square, which at most swap the two
+  diagonals,
+- the 24 permutations of bands and rows that are their own mirror image,
+  the same permutation being applied to the stacks and columns,
+- any relabelling of the digits.
+
+Recent solutions are held in a bounded LRU in memory, and optionally in a
+sqlite database that several worker processes can share.
+"""
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from operator import itemgetter
+
+from utils import *
+import solution
+
+digits = '123456789'
+size = 9
+
+def compose(first, second):
+    """The permutation that applies first and then second, as lists of source indices."""
+    return [first[i] for i in second]
+
+def line_permutations():
+    """
+    The permutations of rows that keep the bands intact and commute with
+    reversing the rows, so applying one to both rows and columns keeps each
+    diagonal in place. The middle band and row can only be reversed, and the
+    outer bands may be swapped while mirroring each other.
+    """
+    orders = [(0, 1, 2), (0, 2, 1), (1, 0, 2), (1, 2, 0), (2, 0, 1), (2, 1, 0)]
+    permutations = []
+    for outer in (0, 2):
+        for middle in ((3, 4, 5), (5, 4, 3)):
+            for order in orders:
+                lines = [0] * size
+                for r in range(3):
+                    lines[r] = outer * 3 + order[r]
+                    lines[size - 1 - r] = size - 1 - lines[r]
+                lines[3:6] = middle
+                permutations.append(lines)
+    return permutations
+
+def build_transforms():
+    """
+    Every distinct rearrangement of the boxes that maps the units of a
+    diagonal sudoku onto units, as lists where box i of the new grid comes
+    from box transform[i] of the old one.
+    """
+    identity = list(range(size * size))
+    transpose = [c * size + r for r in range(size) for c in range(size)]
+    rotate = [(size - 1 - c) * size + r for r in range(size) for c in range(size)]
+    squares = [identity]
+    for _ in range(3):
+        squares.append(compose(squares[-1], rotate))
+    squares += [compose(s, transpose) for s in squares]
+    lines = [[p[r] * size + p[c] for r in range(size) for c in range(size)] for p in line_permutations()]
+    transforms = OrderedDict()
+    for s in squares:
+        for l in lines:
+            transforms[tuple(compose(l, s))] = None
+    return [list(t) for t in transforms]
+
+transforms = build_transforms()
+getters = [itemgetter(*t) for t in transforms]
+
+def symmetry(grid, index, labels=digits):
+    """Rearrange a grid by one of the transforms and rename digit d to labels[int(d) - 1]."""
+    return ''.join(getters[index](grid)).translate(str.maketrans(digits, labels))
+
+def relabel(grid):
+    """
+    Relabel the digits of a grid in order of first appearance, so the first
+    digit read becomes 1, the next new one 2 and so on.
+    Returns:
+        the relabelled grid and the digits in their order of first appearance.
+    """
+    order = ''.join(c for c in dict.fromkeys(grid) if c in digits)
+    return grid.translate(str.maketrans(order, digits[:len(order)])), order
+
+#Marks the filled boxes of a grid with 1 and the unknown boxes with 0
+filled = str.maketrans(digits + '.', '1' * len(digits) + '0')
+
+def canonical(grid):
+    """
+    Find the canonical form of an 81 character grid, the lexicographically
+    smallest grid reachable by a symmetry with the digits relabelled, among
+    the symmetries giving the smallest pattern of filled boxes.
+    Returns:
+        the canonical grid, the index into transforms that reaches it and the
+        digits of the grid in the order they were relabelled 1, 2, ...
+
+    Comparing the patterns first is cheap and rules out most symmetries, so
+    only the few that tie are relabelled.
+    """
+    grid = ''.join(c if c in digits else '.' for c in grid)
+    pattern = grid.translate(filled)
+    patterns = [''.join(getter(pattern)) for getter in getters]
+    smallest = min(patterns)
+    best = None
+    for index, getter in enumerate(getters):
+        if patterns[index] != smallest:
+            continue
+        candidate, order = relabel(''.join(getter(grid)))
+        if best is None or candidate < best[0]:
+            best = (candidate, index, order)
+    return best
+
+def restore(canonical_solution, index, order):
+    """Map a solved canonical grid back through the symmetry that produced it."""
+    #Digits missing from the puzzle may take any of the labels left over
+    order += ''.join(d for d in digits if d not in order)
+    solved = canonical_solution.translate(str.maketrans(digits, order))
+    grid = [None] * len(solved)
+    for i, source in enumerate(transforms[index]):
+        grid[source] = solved[i]
+    return ''.join(grid)
+
+
+#Options of solution.solve that change what it returns or record the solve
+#of the canonical puzzle rather than the grid asked for
+UNCACHEABLE = ('max_nodes', 'deadline', 'recorder')
+
+class SolutionCache:
+    """
+    Solve 81 character grids through a cache of canonical puzzles.
+    Args:
+        maxsize(int): the number of canonical puzzles kept in memory.
+        path(string): a sqlite database file holding solutions across runs and
+            processes, or None to keep the cache in memory only.
+        options: keyword arguments passed on to solution.solve on a miss,
+            other than those in UNCACHEABLE.
+
+    The counters hits, disk_hits and misses, and the seconds spent
+    canonicalizing and solving, are kept so info can show whether the cache
+    is paying for itself.
+    """
+    def __init__(self, maxsize=1024, path=None, **options):
+        rejected = sorted(name for name in UNCACHEABLE if options.get(name) is not None)
+        if rejected:
+            raise ValueError("SolutionCache cannot pass on %s" % ', '.join(rejected))
+        self.maxsize = maxsize
+        self.path = path
+        self.options = options
+        self.entries = OrderedDict()
+        self.connection = None
+        self.pid = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.canonical_time = 0.0
+        self.solve_time = 0.0
+
+    def database(self):
+        """
+        Return the connection to the on-disk store, opening it on first use
+        and again in a forked worker, since connections can't be shared
+        between processes.
+        """
+        if self.connection is None or self.pid != os.getpid():
+            self.connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS solutions (puzzle TEXT PRIMARY KEY, solution TEXT NOT NULL)')
+            self.pid = os.getpid()
+        return self.connection
+
+    def lookup(self, key):
+        """The cached canonical solution of a canonical puzzle, '' if unsolvable or None if unknown."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        if self.path is None:
+            return None
+        row = self.database().execute('SELECT solution FROM solutions WHERE puzzle = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        self.disk_hits += 1
+        self.remember(key, row[0])
+        return row[0]
+
+    def remember(self, key, solved):
+        """Keep a canonical solution in memory, evicting the least recently used."""
+        self.entries[key] = solved
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def store(self, key, solved):
+        """Keep a canonical solution in memory and on disk."""
+        self.remember(key, solved)
+        if self.path is not None:
+            self.database().execute('INSERT OR IGNORE INTO solutions VALUES (?, ?)', (key, solved))
+
+    def solve(self, grid):
+        """
+        Find the solution to a Sudoku grid, from the cache if it or any
+        symmetry of it has been solved before.
+        Returns:
+            The dictionary representation of the final sudoku grid. False if no solution exists.
+        """
+        if len(grid) != 81:
+            raise ValueError("SolutionCache only solves 81 character grids")
+        start = time.perf_counter()
+        key, index, order = canonical(grid)
+        self.canonical_time += time.perf_counter() - start
+        solved = self.lookup(key)
+        if solved is None:
+            self.misses += 1
+            start = time.perf_counter()
+            values = solution.solve(key, **self.options)
+            self.solve_time += time.perf_counter() - start
+            solved = ''.join(values[box] for box in boxes) if values else ''
+            self.store(key, solved)
+        if not solved:
+            return False
+        return dict(zip(boxes, restore(solved, index, order)))
+
+    def info(self):
+        """
+        The cache counters as a dictionary, with the hit rate and the mean
+        cost in seconds of canonicalizing a grid and of solving a miss.
+        """
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'size': len(self.entries),
+            'hit_rate': float(self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            'canonical_seconds': self.canonical_time / lookups if lookups else 0.0,
+            'solve_seconds': self.solve_time / self.misses if self.misses else 0.0,
+        }
+
+    def close(self):
+        """Close the connection to the on-disk store."""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
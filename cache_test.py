@@ -0,0 +1,83 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import cache
+import solution
+import solution_test
+from utils import *
+
+
+class TestCanonical(solution_test.DiagonalPuzzle, unittest.TestCase):
+
+    def test_transforms_keep_units(self):
+        index = dict((box, i) for i, box in enumerate(boxes))
+        units = set(frozenset(index[box] for box in unit) for unit in unit_list)
+        for transform in cache.transforms:
+            moved = set(frozenset(transform[i] for i in unit) for unit in units)
+            self.assertEqual(moved, units)
+
+    def test_symmetries_share_canonical_form(self):
+        rng = random.Random(0)
+        key = cache.canonical(self.diagonal_grid)[0]
+        for index in rng.sample(range(len(cache.transforms)), 10):
+            labels = ''.join(rng.sample(cache.digits, 9))
+            self.assertEqual(cache.canonical(cache.symmetry(self.diagonal_grid, index, labels))[0], key)
+
+    def test_restore_inverts_canonical(self):
+        key, index, order = cache.canonical(self.diagonal_grid)
+        self.assertEqual(cache.restore(key, index, order), self.diagonal_grid)
+
+
+class TestSolutionCache(solution_test.DiagonalPuzzle, unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_hit_on_symmetry(self):
+        solutions = cache.SolutionCache(engine='bitmask')
+        self.assertEqual(solutions.solve(self.diagonal_grid), self.solved_diag_sudoku)
+        variant = cache.symmetry(self.diagonal_grid, 37, '531297846')
+        self.assertEqual(solutions.solve(variant), solution.solve(variant, engine='bitmask'))
+        info = solutions.info()
+        self.assertEqual((info['hits'], info['misses']), (1, 1))
+        self.assertEqual(info['hit_rate'], 0.5)
+
+    def test_unsolvable_is_cached(self):
+        solutions = cache.SolutionCache()
+        grid = '11' + '.' * 79
+        self.assertFalse(solutions.solve(grid))
+        self.assertFalse(solutions.solve(grid))
+        self.assertEqual(solutions.hits, 1)
+
+    def test_lru_eviction(self):
+        solutions = cache.SolutionCache(maxsize=1, engine='bitmask')
+        solutions.solve(self.diagonal_grid)
+        solutions.solve('11' + '.' * 79)
+        solutions.solve(self.diagonal_grid)
+        self.assertEqual(solutions.misses, 3)
+        self.assertEqual(len(solutions.entries), 1)
+
+    def test_rejects_what_it_cannot_cache(self):
+        with self.assertRaises(ValueError):
+            cache.SolutionCache(max_nodes=1000)
+        with self.assertRaises(ValueError):
+            cache.SolutionCache(engine='bitmask').solve('.' * 256)
+
+    def test_disk_store_is_shared(self):
+        path = os.path.join(self.directory, 'solutions.db')
+        first = cache.SolutionCache(path=path, engine='bitmask')
+        first.solve(self.diagonal_grid)
+        first.close()
+        second = cache.SolutionCache(path=path, engine='bitmask')
+        self.assertEqual(second.solve(cache.symmetry(self.diagonal_grid, 5)), solution.solve(cache.symmetry(self.diagonal_grid, 5), engine='bitmask'))
+        self.assertEqual((second.disk_hits, second.misses), (1, 0))
+        second.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+"""
+Exact cover engine for the diagonal sudoku solver, using Knuth's Algorithm X
+with dancing links.
+
+Every (box, digit) placement is a row of the constraint matrix. It covers the
+column for its box being filled, and the column for its digit appearing in
+each unit of utils.unit_list the box belongs to, so rows, columns, squares
+and both diagonals are all handled the same way. The links are held in flat
+integer lists rather than node objects.
+"""
+from utils import *
+
+digits = '123456789'
+
+#Column 0 is the root. Columns 1-81 are the boxes, then one column per
+#(unit, digit) pair.
+box_column = dict((box, 1 + i) for i, box in enumerate(boxes))
+unit_digit_column = [[1 + len(boxes) + u * 9 + d for d in range(9)] for u in range(len(unit_list))]
+column_count = len(boxes) + len(unit_list) * 9
+
+def build_placements():
+    """
+    List every placement as (box, digit, columns), the columns being those it
+    covers, in the order rows are created.
+    """
+    placements = []
+    for box in boxes:
+        box_unit_ids = [u for u, unit in enumerate(unit_list) if box in unit]
+        for d in range(9):
+            covered = [box_column[box]] + [unit_digit_column[u][d] for u in box_unit_ids]
+            placements.append((box, digits[d], covered))
+    return placements
+
+placements = build_placements()
+
+def build_links():
+    """
+    Build the dancing links for the full constraint matrix, as the lists
+    (left, right, up, down, column, row, size) indexed by node number.
+    Nodes 0..column_count are the root and column headers.
+    """
+    n = column_count + 1
+    left = [i - 1 for i in range(n)]
+    right = [i + 1 for i in range(n)]
+    left[0] = n - 1
+    right[n - 1] = 0
+    up = list(range(n))
+    down = list(range(n))
+    column = list(range(n))
+    row = [-1] * n
+    size = [0] * n
+    for r, (box, digit, columns) in enumerate(placements):
+        first = len(left)
+        for c in columns:
+            node = len(left)
+            #Link the node into the bottom of its column
+            up.append(up[c])
+            down.append(c)
+            down[up[c]] = node
+            up[c] = node
+            column.append(c)
+            row.append(r)
+            size[c] += 1
+            #Link the node into its row
+            left.append(node - 1 if node > first else node)
+            right.append(first)
+            if node > first:
+                right[node - 1] = node
+                left[first] = node
+    return left, right, up, down, column, row, size
+
+#Template copied for each solve, as building the links is the larger cost
+template = build_links()
+row_index = dict(((box, digit), r) for r, (box, digit, columns) in enumerate(placements))
+
+def build_row_first_node():
+    """The first node of each row in the template links, found by walking the nodes backwards."""
+    row_first_node = [0] * len(placements)
+    for node in range(len(template[5]) - 1, column_count, -1):
+        row_first_node[template[5][node]] = node
+    return row_first_node
+
+row_first_node = build_row_first_node()
+
+
+class ExactCover:
+    """The dancing links for one puzzle, with Algorithm X search."""
+    def __init__(self):
+        self.left, self.right, self.up, self.down, self.column, self.row, self.size = [a[:] for a in template]
+        self.covered = [False] * (column_count + 1)
+        self.solution = []
+
+    def cover(self, c):
+        """Remove a column and every row that meets it from the matrix."""
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        right[left[c]] = right[c]
+        left[right[c]] = left[c]
+        self.covered[c] = True
+        i = down[c]
+        while i != c:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, c):
+        """Restore a column removed by cover, in exactly the reverse order."""
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        i = up[c]
+        while i != c:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        self.covered[c] = False
+        right[left[c]] = c
+        left[right[c]] = c
+
+    def select(self, box, digit):
+        """
+        Place a given digit by covering every column its row meets.
+        Returns False if one of those columns is already covered by another
+        given, meaning the givens conflict.
+        """
+        first = row_first_node[row_index[(box, digit)]]
+        node = first
+        while True:
+            if self.covered[self.column[node]]:
+                return False
+            node = self.right[node]
+            if node == first:
+                break
+        while True:
+            self.cover(self.column[node])
+            node = self.right[node]
+            if node == first:
+                break
+        self.solution.append(self.row[first])
+        return True
+
+    def search(self):
+        """
+        Algorithm X, branching on the column with the fewest rows left.
+        Returns True once every column is covered, with the chosen rows
+        in self.solution.
+        """
+        right, down, column, size = self.right, self.down, self.column, self.size
+        if right[0] == 0:
+            return True
+        c = right[0]
+        best = c
+        while c != 0:
+            if size[c] < size[best]:
+                best = c
+                if size[c] <= 1:
+                    break
+            c = right[c]
+        c = best
+        if size[c] == 0:
+            return False
+        self.cover(c)
+        r = down[c]
+        while r != c:
+            self.solution.append(self.row[r])
+            j = right[r]
+            while j != r:
+                self.cover(column[j])
+                j = right[j]
+            if self.search():
+                return True
+            j = self.left[r]
+            while j != r:
+                self.uncover(column[j])
+                j = self.left[j]
+            self.solution.pop()
+            r = down[r]
+        self.uncover(c)
+        return False
+
+def solve(grid):
+    """
+    Find the solution to a Sudoku grid as an exact cover problem.
+    Returns:
+        The dictionary representation of the final sudoku grid. False if no solution exists.
+    """
+    assert len(grid) == 81
+    matrix = ExactCover()
+    for box, value in zip(boxes, grid):
+        if value in digits and not matrix.select(box, value):
+            return False
+    if not matrix.search():
+        return False
+    return dict((placements[r][0], placements[r][1]) for r in matrix.solution)
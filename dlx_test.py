@@ -0,0 +1,41 @@
+import dlx
+import solution
+import solution_test
+import unittest
+
+
+class TestExactCover(solution_test.DiagonalPuzzle, unittest.TestCase):
+
+    def test_matrix(self):
+        #One column per box, and one per digit in each of the 29 units
+        self.assertEqual(dlx.column_count, 81 + 29 * 9)
+        self.assertEqual(len(dlx.placements), 729)
+        #Boxes on both diagonals belong to five units
+        self.assertEqual(len(dict((b, c) for b, d, c in dlx.placements)['E5']), 6)
+
+    def test_solve(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, engine='dlx'), self.solved_diag_sudoku)
+
+    def test_empty_grid(self):
+        values = dlx.solve('.' * 81)
+        for unit in solution.unit_list:
+            self.assertEqual(sorted(values[box] for box in unit), list('123456789'))
+
+    def test_conflicting_givens(self):
+        self.assertFalse(dlx.solve('11' + '.' * 79))
+
+    def test_unsolvable(self):
+        #Two 1s on the main diagonal
+        self.assertFalse(dlx.solve('1' + '.' * 9 + '1' + '.' * 70))
+
+    def test_matrix_restored(self):
+        matrix = dlx.ExactCover()
+        links = [a[:] for a in (matrix.left, matrix.right, matrix.up, matrix.down, matrix.size)]
+        matrix.cover(1)
+        matrix.cover(200)
+        matrix.uncover(200)
+        matrix.uncover(1)
+        self.assertEqual([matrix.left, matrix.right, matrix.up, matrix.down, matrix.size], links)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Generate diagonal sudoku puzzles that have exactly one solution.
+
+Each puzzle starts from a random full grid, found by the bitmask search
+trying digits in a random order. Clues are then removed one at a time in a
+random order, putting back any whose removal leaves a second solution. The
+difficulty of the result is the number of search nodes solve visits on it,
+read from a stats.SolveStats, and puzzles outside the wanted range are
+thrown away.
+
+Every puzzle is made from its own seed, so the same seeds give the same
+puzzles however many processes share the work.
+
+Run with: python generator.py [-n count] [--seed seed] [-p processes]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+from functools import partial
+from itertools import count as count_from, islice
+
+import bitmask
+import solution
+from stats import SolveStats
+
+def random_grid(rng, masks=None):
+    """
+    Fill a list of masks, empty by default, with a random solution found by
+    the bitmask search trying the digits of each box in a random order.
+    Returns False if the masks have no solution.
+    """
+    if masks is None:
+        masks = [bitmask.ALL_DIGITS] * len(bitmask.box_index)
+    masks = bitmask.reduce_puzzle(masks)
+    if masks is False:
+        return False
+    s = bitmask.choose_box(masks)
+    if s is None:
+        return masks
+    children = bitmask.branches(masks, s)
+    rng.shuffle(children)
+    for child in children:
+        attempt = random_grid(rng, child)
+        if attempt:
+            return attempt
+    return False
+
+def remove_clues(masks, rng, min_clues=0):
+    """
+    Clear the boxes of a solved grid in a random order, keeping each clue
+    whose removal would leave more than one solution.
+    Returns the masks of the puzzle, ALL_DIGITS for the cleared boxes.
+
+    While the puzzle so far has only the one solution, any other solution
+    left by clearing a box must put another digit in that box, so each
+    check is a single search for a solution with the digit ruled out,
+    rather than counting solutions.
+    """
+    masks = masks[:]
+    clues = len(masks)
+    order = list(range(len(masks)))
+    rng.shuffle(order)
+    for i in order:
+        if clues <= min_clues:
+            break
+        digit = masks[i]
+        masks[i] = bitmask.ALL_DIGITS & ~digit
+        if bitmask.search(masks[:]) is False:
+            masks[i] = bitmask.ALL_DIGITS
+            clues -= 1
+        else:
+            masks[i] = digit
+    return masks
+
+def difficulty(grid):
+    """The number of search nodes the trail search visits solving a grid."""
+    stats = SolveStats()
+    solution.solve(grid, backtracking='trail', stats=stats)
+    return stats.nodes
+
+def generate(seed, min_nodes=1, max_nodes=None, min_clues=0, attempts=100):
+    """
+    Generate one puzzle with a unique solution from a seed.
+    Args:
+        seed: the seed for the random number generator.
+        min_nodes(int), max_nodes(int): the range of search nodes solve may
+            visit on the puzzle, max_nodes None for no upper limit.
+        min_clues(int): stop removing clues once this few are left.
+        attempts(int): the number of puzzles made before giving up on one
+            within the range.
+    Returns:
+        The 81 character puzzle with '.' for the unknown boxes, or None if no
+        attempt fell within the range of nodes.
+    """
+    rng = random.Random(seed)
+    for _ in range(attempts):
+        masks = remove_clues(random_grid(rng), rng, min_clues)
+        grid = bitmask.standard.masks_grid(masks)
+        nodes = difficulty(grid)
+        if nodes >= min_nodes and (max_nodes is None or nodes <= max_nodes):
+            return grid
+    return None
+
+def generate_many(count, seed=0, processes=None, batch_size=64, **target):
+    """
+    Generate puzzles across a pool of worker processes, yielding them in
+    lists of up to batch_size as they are made.
+    Args:
+        count(int): the number of puzzles to make, None to go on forever.
+        seed(int): puzzle i is made from the seed seed + i.
+        processes(int): the number of worker processes, None for one per CPU
+            or 1 to generate in this process without a pool.
+        batch_size(int): the number of puzzles in each list yielded.
+        target: min_nodes, max_nodes, min_clues and attempts passed to generate.
+
+    Puzzles are yielded in seed order. Seeds that give no puzzle in the
+    wanted range after every attempt are skipped.
+    """
+    seeds = range(seed, seed + count) if count is not None else count_from(seed)
+    worker = partial(generate, **target)
+    if processes == 1:
+        puzzles = map(worker, seeds)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(processes or os.cpu_count() or 1)
+        puzzles = pool.imap(worker, seeds, chunksize=4)
+    try:
+        puzzles = (puzzle for puzzle in puzzles if puzzle is not None)
+        while True:
+            batch = list(islice(puzzles, batch_size))
+            if not batch:
+                break
+            yield batch
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate diagonal sudoku puzzles with unique solutions.')
+    parser.add_argument('-n', '--count', type=int, default=10, help='puzzles to generate, 0 to go on forever')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first puzzle')
+    parser.add_argument('-p', '--processes', type=int, default=None, help='worker processes, default one per CPU')
+    parser.add_argument('--batch-size', type=int, default=64, help='puzzles written at a time')
+    parser.add_argument('--min-nodes', type=int, default=1, help='fewest search nodes solve may visit')
+    parser.add_argument('--max-nodes', type=int, default=None, help='most search nodes solve may visit')
+    parser.add_argument('--min-clues', type=int, default=0, help='stop removing clues at this many')
+    args = parser.parse_args(argv)
+
+    batches = generate_many(args.count or None, args.seed, args.processes, args.batch_size,
+                            min_nodes=args.min_nodes, max_nodes=args.max_nodes, min_clues=args.min_clues)
+    for batch in batches:
+        sys.stdout.write(''.join(puzzle + '\n' for puzzle in batch))
+        sys.stdout.flush()
+
+if __name__ == '__main__':
+    main()
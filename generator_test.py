@@ -0,0 +1,43 @@
+import bitmask
+import generator
+import unittest
+
+
+class TestGenerate(unittest.TestCase):
+
+    def test_random_grid(self):
+        masks = generator.random_grid(generator.random.Random(0))
+        self.assertEqual(bitmask.choose_box(masks), None)
+        self.assertEqual(bitmask.reduce_puzzle(masks[:]), masks)
+
+    def test_unique_and_reproducible(self):
+        grid = generator.generate(1)
+        self.assertEqual(generator.generate(1), grid)
+        self.assertEqual(bitmask.count_solutions(bitmask.grid_masks(grid)), 1)
+
+    def test_minimal(self):
+        grid = generator.generate(2)
+        #Every clue is needed, clearing any one leaves a second solution
+        for i, c in enumerate(grid):
+            if c != '.':
+                self.assertEqual(bitmask.count_solutions(bitmask.grid_masks(grid[:i] + '.' + grid[i + 1:]), limit=2), 2)
+
+    def test_node_range(self):
+        grid = generator.generate(3, min_nodes=20, max_nodes=200)
+        self.assertTrue(20 <= generator.difficulty(grid) <= 200)
+
+    def test_min_clues(self):
+        grid = generator.generate(4, min_clues=40)
+        self.assertEqual(81 - grid.count('.'), 40)
+
+
+class TestGenerateMany(unittest.TestCase):
+
+    def test_batches_match_across_processes(self):
+        batches = list(generator.generate_many(5, seed=10, processes=1, batch_size=2))
+        self.assertEqual([len(b) for b in batches], [2, 2, 1])
+        pooled = list(generator.generate_many(5, seed=10, processes=2, batch_size=5))
+        self.assertEqual(pooled, [sum(batches, [])])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Board geometry for diagonal sudoku of any size n*n x n*n.
+
+A Board generates the units, peers and diagonals for its size once, as lists
+of integer box indices, so engines look them up in constant time however
+large the board is. Board(3) is the standard 9x9 board described by utils.py,
+with the same box names and the same unit order.
+"""
+from utils import cross
+
+#Symbols used for the digits, the first n*n are used by a board
+SYMBOLS = '123456789ABCDEFGHIJKLMNOP'
+ROW_NAMES = 'ABCDEFGHIJKLMNOPQRSTUVWXY'
+
+
+class Board:
+    """
+    The geometry of a diagonal sudoku board made of n x n squares.
+    Args:
+        n(int): the width of each square, 3 for the standard 9x9 board.
+        diagonal(bool): whether the two main diagonals are units.
+    """
+    def __init__(self, n=3, diagonal=True):
+        side = n * n
+        if side > len(SYMBOLS):
+            raise ValueError("Boards larger than %dx%d are not supported" % (len(SYMBOLS), len(SYMBOLS)))
+        self.n = n
+        self.side = side
+        self.cells = side * side
+        self.diagonal = diagonal
+        self.digits = SYMBOLS[:side]
+        self.all_digits = (1 << side) - 1
+        self.digit_mask = dict((d, 1 << i) for i, d in enumerate(self.digits))
+
+        #Box names follow utils.py, rows lettered and columns numbered
+        self.rows = ROW_NAMES[:side]
+        self.columns = [str(c) for c in range(1, side + 1)]
+        self.boxes = cross(self.rows, self.columns)
+        self.box_index = dict((box, i) for i, box in enumerate(self.boxes))
+
+        #Units as lists of box indices, in the same order as utils.unit_list
+        row_units = [[r * side + c for c in range(side)] for r in range(side)]
+        column_units = [[r * side + c for r in range(side)] for c in range(side)]
+        square_units = [[(br + r) * side + bc + c for r in range(n) for c in range(n)]
+                        for br in range(0, side, n) for bc in range(0, side, n)]
+        diag_units = []
+        if diagonal:
+            diag_units = [[i * side + i for i in range(side)], [i * side + side - 1 - i for i in range(side)]]
+        self.units = row_units + column_units + square_units + diag_units
+
+        #For each box, the indices of its units and the sorted indices of its peers
+        self.box_units = [[] for i in range(self.cells)]
+        for u, unit in enumerate(self.units):
+            for i in unit:
+                self.box_units[i].append(u)
+        self.peers = [sorted(set(j for u in self.box_units[i] for j in self.units[u]) - set([i]))
+                      for i in range(self.cells)]
+        self.peer_sets = [frozenset(p) for p in self.peers]
+
+    def grid_masks(self, grid):
+        """
+        Convert a grid string into a list of candidate masks, any character
+        other than one of the board's digits being an unknown box.
+        """
+        assert len(grid) == self.cells
+        digit_mask, all_digits = self.digit_mask, self.all_digits
+        return [digit_mask.get(c, all_digits) for c in grid]
+
+    def mask_digits(self, mask):
+        """The string of digits still possible in a mask."""
+        return ''.join(d for i, d in enumerate(self.digits) if mask >> i & 1)
+
+    def masks_values(self, masks):
+        """Convert a list of masks into a dictionary of the form {'A1': '123', ...}."""
+        return dict(zip(self.boxes, [self.mask_digits(m) for m in masks]))
+
+    def masks_grid(self, masks):
+        """Convert a list of masks into a grid string, '.' for unsolved boxes."""
+        return ''.join(self.mask_digits(m) if m and not m & (m - 1) else '.' for m in masks)
+
+#Boards are cached by their square width
+boards = {}
+
+def board(n=3, diagonal=True):
+    """Return the Board for squares of width n, building it on first use."""
+    key = (n, diagonal)
+    if key not in boards:
+        boards[key] = Board(n, diagonal)
+    return boards[key]
+
+def board_for_grid(grid, diagonal=True):
+    """Return the Board whose number of boxes matches the length of a grid string."""
+    n = 1
+    while n ** 4 < len(grid):
+        n += 1
+    if n ** 4 != len(grid):
+        raise ValueError("A grid of %d boxes is not a square sudoku" % len(grid))
+    return board(n, diagonal)
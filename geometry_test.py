@@ -0,0 +1,53 @@
+import bitmask
+import geometry
+import solution
+import unittest
+import utils
+
+
+class TestBoard(unittest.TestCase):
+
+    def test_standard_matches_utils(self):
+        board = geometry.board(3)
+        self.assertEqual(board.boxes, utils.boxes)
+        self.assertEqual([[board.boxes[i] for i in unit] for unit in board.units], utils.unit_list)
+        for i, box in enumerate(board.boxes):
+            self.assertEqual(set(board.boxes[j] for j in board.peers[i]), utils.peers[box])
+
+    def test_sizes(self):
+        for n in (2, 3, 4, 5):
+            board = geometry.board(n)
+            self.assertEqual(len(board.units), 3 * n * n + 2)
+            for unit in board.units:
+                self.assertEqual(len(set(unit)), n * n)
+            #The centre of an odd board lies on both diagonals
+            centre = board.cells // 2
+            if n % 2:
+                self.assertEqual(len(board.box_units[centre]), 5)
+
+    def test_board_for_grid(self):
+        self.assertIs(geometry.board_for_grid('.' * 256), geometry.board(4))
+        with self.assertRaises(ValueError):
+            geometry.board_for_grid('.' * 80)
+
+
+class TestLargeBoards(unittest.TestCase):
+
+    def check_solution(self, board, grid, values):
+        for i, box in enumerate(board.boxes):
+            if grid[i] in board.digits:
+                self.assertEqual(values[box], grid[i])
+        for unit in board.units:
+            self.assertEqual(sorted(values[board.boxes[i]] for i in unit), sorted(board.digits))
+
+    def test_solve_16x16(self):
+        board = geometry.board(4)
+        full = board.masks_grid(bitmask.search(board.grid_masks('.' * board.cells), board))
+        grid = ''.join('.' if i % 3 else d for i, d in enumerate(full))
+        self.check_solution(board, grid, solution.solve(grid, engine='bitmask'))
+
+    def test_unsolvable_16x16(self):
+        self.assertFalse(bitmask.solve('11' + '.' * 254))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Variable and value ordering heuristics for search in solution.py.
+
+A branching heuristic takes a reduced, unsolved values dictionary and
+returns the branches to try as a list of (box, digit) placements, which
+between them must cover every solution. Branching on a box gives one
+placement for each of its possible digits, and branching on where a digit
+goes in a unit gives one placement for each box of the unit that can hold
+it.
+
+A value ordering takes the values and that list and returns it in the order
+the branches should be tried.
+
+Pass them as solve(grid, branching=..., value_order=...), or pick them by
+name from BRANCHING and VALUE_ORDERS.
+"""
+from utils import *
+
+digits = '123456789'
+
+def box_branches(values, box):
+    """A placement for each possible digit of a box, in digit order."""
+    return [(box, digit) for digit in values[box]]
+
+def mrv(values):
+    """
+    Branch on the box with the fewest possible digits, the first by name on
+    a tie, as search does by default.
+    """
+    n, s = min((len(values[s]), s) for s in boxes if len(values[s]) > 1)
+    return box_branches(values, s)
+
+def degree(values, box):
+    """The number of unsolved peers of a box."""
+    return sum(1 for peer in peers[box] if len(values[peer]) > 1)
+
+def mrv_degree(values):
+    """
+    Branch on the box with the fewest possible digits, breaking ties by the
+    most unsolved peers, so the guess constrains as much of the board as it
+    can.
+    """
+    n, d, s = min((len(values[s]), -degree(values, s), s) for s in boxes if len(values[s]) > 1)
+    return box_branches(values, s)
+
+def most_constrained_unit(values):
+    """
+    Branch on the box with the fewest possible digits within the unit with
+    the fewest unsolved boxes, so units are finished one at a time.
+    """
+    open_units = []
+    for unit in unit_list:
+        unsolved = [box for box in unit if len(values[box]) > 1]
+        if unsolved:
+            open_units.append((len(unsolved), unsolved))
+    n, unsolved = min(open_units, key=lambda unit: unit[0])
+    n, s = min((len(values[s]), s) for s in unsolved)
+    return box_branches(values, s)
+
+def unit_digit(values):
+    """
+    Branch on the box with the fewest possible digits, or on the boxes where
+    a digit can go in a unit if some unplaced digit has fewer places than
+    that box has digits.
+    """
+    branches = mrv(values)
+    for unit in unit_list:
+        for digit in digits:
+            places = [box for box in unit if digit in values[box]]
+            if 1 < len(places) < len(branches) and not any(values[box] == digit for box in places):
+                branches = [(box, digit) for box in places]
+                if len(branches) == 2:
+                    return branches
+    return branches
+
+def lcv(values, branches):
+    """
+    Least constraining value: try first the placements that remove the
+    digit from the fewest unsolved peers, leaving the most room for the rest
+    of the board.
+    """
+    def removed(placement):
+        box, digit = placement
+        return sum(1 for peer in peers[box] if digit in values[peer] and len(values[peer]) > 1)
+    return sorted(branches, key=removed)
+
+#The heuristics by name, for choosing per workload from a configuration
+BRANCHING = {
+    'mrv': mrv,
+    'mrv_degree': mrv_degree,
+    'most_constrained_unit': most_constrained_unit,
+    'unit_digit': unit_digit,
+}
+
+VALUE_ORDERS = {
+    'lcv': lcv,
+}
@@ -0,0 +1,58 @@
+import benchmark
+import heuristics
+import solution
+import solution_test
+import unittest
+
+
+class TestBranching(solution_test.DiagonalPuzzle, unittest.TestCase):
+
+    def test_mrv(self):
+        values = solution.grid_values('.' * 81)
+        values.update(C3='12', A1='45')
+        self.assertEqual(heuristics.mrv(values), [('A1', '4'), ('A1', '5')])
+
+    def test_mrv_degree(self):
+        values = solution.grid_values('.' * 81)
+        values.update(A2='12', E5='45')
+        #E5 lies on both diagonals so has more unsolved peers
+        self.assertEqual(heuristics.mrv_degree(values), [('E5', '4'), ('E5', '5')])
+
+    def test_most_constrained_unit(self):
+        values = solution.grid_values('.' * 81)
+        for box in solution.row_units[8][:7]:
+            values[box] = '1'
+        values.update(I8='89', I9='789', A1='12')
+        self.assertEqual(heuristics.most_constrained_unit(values), [('I8', '8'), ('I8', '9')])
+
+    def test_unit_digit(self):
+        values = solution.grid_values('.' * 81)
+        values['A1'] = '123'
+        for box in solution.row_units[1][2:]:
+            values[box] = '2345678'
+        self.assertEqual(heuristics.unit_digit(values), [('B1', '1'), ('B2', '1')])
+
+    def test_lcv(self):
+        values = solution.grid_values('.' * 81)
+        values['A1'] = '12'
+        for box in solution.peers['A1']:
+            values[box] = '23456789'
+        self.assertEqual(heuristics.lcv(values, heuristics.mrv(values)), [('A1', '1'), ('A1', '2')])
+        self.assertEqual(heuristics.lcv(values, [('A1', '2'), ('A1', '1')]), [('A1', '1'), ('A1', '2')])
+
+    def test_solve(self):
+        for branching in heuristics.BRANCHING.values():
+            for value_order in (None, heuristics.lcv):
+                self.assertEqual(solution.solve(self.diagonal_grid, branching=branching, value_order=value_order),
+                                 self.solved_diag_sudoku)
+        self.assertFalse(solution.solve('11' + '.' * 79, branching=heuristics.mrv_degree))
+        self.assertRaises(ValueError, solution.solve, self.diagonal_grid, backtracking='trail', branching=heuristics.mrv)
+
+    def test_unsolvable_is_false(self):
+        #Both branch loops agree on False once every branch has failed
+        unsolvable = benchmark.load_puzzles('unsolvable.txt')[0]
+        self.assertIs(solution.solve(unsolvable), False)
+        self.assertIs(solution.solve(unsolvable, branching=heuristics.mrv), False)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,307 @@
+"""
+Packed binary puzzle files, read and written through a memory map.
+
+A file is an 8 byte header followed by fixed size records, one per puzzle:
+
+    header: b'SDKP', version (uint16), record size (uint16)
+    record: status (uint8), reserved (uint8), clue count (uint16),
+            givens (41 bytes), solution (41 bytes)
+
+Givens and solutions hold one box per 4 bits, high nibble first in box
+order, 0 for an unknown box and 1-9 for a digit, with the last nibble
+unused. Because every nibble is a decimal digit, bytes.hex() of the packed
+givens is already the grid string with '0' for unknown boxes, so records
+are converted to and from grids without a Python loop over the boxes.
+
+Run with:
+    python packed.py pack puzzles.txt puzzles.sdk
+    python packed.py solve puzzles.sdk [--engine bitmask]
+    python packed.py unpack puzzles.sdk [solutions.txt]
+"""
+import argparse
+import mmap
+import struct
+import sys
+
+import batch
+import vectorized
+from vectorized import np
+
+MAGIC = b'SDKP'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sHH')
+RECORD_HEADER = struct.Struct('<BBH')
+GRID_BYTES = 41
+RECORD_SIZE = RECORD_HEADER.size + 2 * GRID_BYTES
+GIVENS = RECORD_HEADER.size
+SOLUTION = GIVENS + GRID_BYTES
+
+#Status of each record
+UNSOLVED = 0
+SOLVED = 1
+UNSOLVABLE = 2
+INVALID = 3
+STATUS_NAMES = {UNSOLVED: 'unsolved', SOLVED: batch.SOLVED, UNSOLVABLE: batch.UNSOLVABLE, INVALID: batch.INVALID}
+
+#Read unknown boxes as '.', and accept either '.' or '0' when packing
+UNPACK = str.maketrans('0', '.')
+PACK = str.maketrans('.', '0')
+
+def pack_grid(grid):
+    """Pack an 81 character grid into 41 bytes."""
+    return bytes.fromhex(grid.translate(PACK) + '0')
+
+def unpack_grid(data):
+    """Unpack 41 bytes into an 81 character grid, '.' for unknown boxes."""
+    return data.hex()[:81].translate(UNPACK)
+
+def pack_record(grid, status=UNSOLVED, solved=None):
+    """
+    Build the record for a grid, which is stored as INVALID with empty
+    givens if it is not a valid puzzle line.
+    """
+    puzzle = batch.parse_line(grid)
+    if puzzle is None:
+        return RECORD_HEADER.pack(INVALID, 0, 0) + bytes(2 * GRID_BYTES)
+    clues = 81 - puzzle.count('.')
+    return RECORD_HEADER.pack(status, 0, clues) + pack_grid(puzzle) + pack_grid(solved or '.' * 81)
+
+def write_header(f):
+    f.write(FILE_HEADER.pack(MAGIC, VERSION, RECORD_SIZE))
+
+def pack_lines(lines, path):
+    """
+    Write an iterable of puzzle lines to a packed file, one record per
+    non-blank line. Returns the number of records written.
+    """
+    count = 0
+    with open(path, 'wb') as f:
+        write_header(f)
+        for line in lines:
+            if line.strip():
+                f.write(pack_record(line.strip()))
+                count += 1
+    return count
+
+
+class PackedFile:
+    """
+    A packed puzzle file mapped into memory.
+    Args:
+        path(string): the file to open.
+        writable(bool): map the file for writing, so solutions can be
+            stored in place with set_solution.
+
+    Records are read straight from the mapping, so opening a file of any
+    size costs nothing until its records are used. Use as a context manager,
+    or call close.
+    """
+    def __init__(self, path, writable=False):
+        self.file = open(path, 'r+b' if writable else 'rb')
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        self.map = mmap.mmap(self.file.fileno(), 0, access=access)
+        magic, version, record_size = FILE_HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError("%s is not a version %d packed puzzle file" % (path, VERSION))
+        self.count = (len(self.map) - FILE_HEADER.size) // RECORD_SIZE
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        """Flush any solutions written and unmap the file."""
+        if not self.map.closed:
+            self.map.flush()
+            self.map.close()
+        self.file.close()
+
+    def offset(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError("record %d out of range" % index)
+        return FILE_HEADER.size + index * RECORD_SIZE
+
+    def record(self, index):
+        """The bytes of a record as a memoryview onto the mapping, without copying."""
+        start = self.offset(index)
+        return memoryview(self.map)[start:start + RECORD_SIZE]
+
+    def records(self, start=0, stop=None):
+        """
+        A memoryview of the records from start to stop, without copying.
+        Release it before closing the file.
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        start = min(start, stop)
+        return memoryview(self.map)[FILE_HEADER.size + start * RECORD_SIZE:FILE_HEADER.size + stop * RECORD_SIZE]
+
+    def table(self, start=0, stop=None):
+        """
+        The records from start to stop as an (N, RECORD_SIZE) numpy array of
+        bytes sharing memory with the mapping. Requires numpy.
+        """
+        vectorized.require_numpy()
+        records = self.records(start, stop)
+        return np.frombuffer(records, dtype=np.uint8).reshape(-1, RECORD_SIZE)
+
+    def digits(self, start=0, stop=None):
+        """The givens of the records from start to stop as an (N, 81) array of digits, 0 for unknown."""
+        givens = self.table(start, stop)[:, GIVENS:GIVENS + GRID_BYTES]
+        digits = np.empty((len(givens), 2 * GRID_BYTES), dtype=np.uint8)
+        digits[:, 0::2] = givens >> 4
+        digits[:, 1::2] = givens & 15
+        return digits[:, :81]
+
+    def status(self, index):
+        """The status of a record, one of UNSOLVED, SOLVED, UNSOLVABLE or INVALID."""
+        return self.map[self.offset(index)]
+
+    def grid(self, index):
+        """The givens of a record as an 81 character grid."""
+        start = self.offset(index) + GIVENS
+        return unpack_grid(self.map[start:start + GRID_BYTES])
+
+    def solution(self, index):
+        """The solved grid of a record, or None unless its status is SOLVED."""
+        start = self.offset(index)
+        if self.map[start] != SOLVED:
+            return None
+        return unpack_grid(self.map[start + SOLUTION:start + SOLUTION + GRID_BYTES])
+
+    def set_solution(self, index, solved):
+        """
+        Store the result of solving a record in place, solved being the 81
+        character solved grid, or None if the puzzle has no solution.
+        """
+        start = self.offset(index)
+        if solved is None:
+            self.map[start] = UNSOLVABLE
+        else:
+            self.map[start + SOLUTION:start + SOLUTION + GRID_BYTES] = pack_grid(solved)
+            self.map[start] = SOLVED
+
+    def scan(self, statuses, start=0, stop=None, block=4096):
+        """
+        Yield (index, grid) for the records from start to stop whose status
+        is in statuses. Each block of records is converted to text in one
+        call and the grids sliced out of it, rather than record by record.
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        data = self.map
+        for first in range(start, stop, block):
+            last = min(first + block, stop)
+            chunk = data[FILE_HEADER.size + first * RECORD_SIZE:FILE_HEADER.size + last * RECORD_SIZE]
+            text = chunk.hex().translate(UNPACK)
+            for i in range(last - first):
+                offset = i * RECORD_SIZE
+                if chunk[offset] in statuses:
+                    begin = 2 * (offset + GIVENS)
+                    yield first + i, text[begin:begin + 81]
+
+    def grids(self, start=0, stop=None):
+        """Yield (index, grid) for the records from start to stop that hold a valid puzzle."""
+        return self.scan((UNSOLVED, SOLVED, UNSOLVABLE), start, stop)
+
+    def unsolved(self):
+        """Yield (index, grid) for every record still UNSOLVED."""
+        return self.scan((UNSOLVED,))
+
+
+def solve_file(path, processes=1, chunksize=64, **options):
+    """
+    Solve every UNSOLVED record of a packed file, writing each solution
+    into its record in place. Returns the number of records solved or found
+    to be unsolvable.
+
+    Options are passed on to batch.solve_many, so a pool of processes can
+    share the work, and a file that was only partly solved picks up where
+    it left off. With engine='vectorized' the file is instead solved a
+    block of records at a time by vectorized.solve_masks, straight from the
+    mapped givens.
+    """
+    if options.get('engine') == 'vectorized':
+        return solve_file_vectorized(path, chunksize * 64)
+    count = 0
+    with PackedFile(path, writable=True) as packed:
+        results = batch.solve_many((grid for index, grid in packed.unsolved()), processes, chunksize, **options)
+        #Results come back in order, and a record is only written once the
+        #scan giving its index has passed it, so both scans see the same records
+        indices = (index for index, grid in packed.unsolved())
+        for index, result in zip(indices, results):
+            packed.set_solution(index, result.solution)
+            count += 1
+    return count
+
+def solve_file_vectorized(path, block=4096):
+    """Solve the UNSOLVED records of a packed file a block at a time with the NumPy batch engine."""
+    count = 0
+    with PackedFile(path, writable=True) as packed:
+        for start in range(0, len(packed), block):
+            status = packed.table(start, start + block)[:, 0]
+            rows = np.flatnonzero(status == UNSOLVED)
+            del status
+            if not len(rows):
+                continue
+            masks = vectorized.digits_masks(packed.digits(start, start + block)[rows])
+            for row, solved in zip(rows, vectorized.solve_masks(masks)):
+                packed.set_solution(start + int(row), solved)
+            count += len(rows)
+    return count
+
+def unpack_lines(path):
+    """
+    Yield a text line for every record of a packed file: the grid, then the
+    status and solved grid tab separated once it has been solved.
+    """
+    with PackedFile(path) as packed:
+        for index in range(len(packed)):
+            status = packed.status(index)
+            if status == UNSOLVED:
+                yield packed.grid(index) + '\n'
+            else:
+                yield '%s\t%s\t%s\n' % (packed.grid(index), STATUS_NAMES[status], packed.solution(index) or '')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert and solve packed puzzle files.')
+    commands = parser.add_subparsers(dest='command')
+    pack = commands.add_parser('pack', help='pack a text file of puzzles, one per line')
+    pack.add_argument('input', help='text file, or - for stdin')
+    pack.add_argument('output', help='packed file to write')
+    solve = commands.add_parser('solve', help='solve the unsolved records of a packed file in place')
+    solve.add_argument('path', help='packed file')
+    solve.add_argument('-p', '--processes', type=int, default=1, help='worker processes')
+    solve.add_argument('--engine', default='bitmask', help="engine passed to solve, or 'vectorized'")
+    unpack = commands.add_parser('unpack', help='write a packed file as text')
+    unpack.add_argument('path', help='packed file')
+    unpack.add_argument('output', nargs='?', default='-', help='text file, or - for stdout')
+    args = parser.parse_args(argv)
+
+    if args.command == 'pack':
+        source = sys.stdin if args.input == '-' else open(args.input)
+        try:
+            pack_lines(source, args.output)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+    elif args.command == 'solve':
+        solve_file(args.path, args.processes, engine=args.engine)
+    elif args.command == 'unpack':
+        target = sys.stdout if args.output == '-' else open(args.output, 'w')
+        try:
+            target.writelines(unpack_lines(args.path))
+        finally:
+            if target is not sys.stdout:
+                target.close()
+    else:
+        parser.print_help()
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
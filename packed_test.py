@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import batch_test
+import packed
+import solution_test
+import vectorized
+
+
+class TestPackedFile(solution_test.DiagonalPuzzle, unittest.TestCase):
+    lines = batch_test.TestSolveMany.lines
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'puzzles.sdk')
+        packed.pack_lines(self.lines, self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        self.assertEqual(packed.unpack_grid(packed.pack_grid(self.diagonal_grid)), self.diagonal_grid)
+        self.assertEqual(len(packed.pack_grid(self.diagonal_grid)), packed.GRID_BYTES)
+
+    def test_layout(self):
+        self.assertEqual(os.path.getsize(self.path), packed.FILE_HEADER.size + 4 * packed.RECORD_SIZE)
+        with packed.PackedFile(self.path) as puzzles:
+            self.assertEqual(len(puzzles), 4)
+            self.assertEqual(puzzles.grid(0), self.diagonal_grid)
+            self.assertEqual(puzzles.status(1), packed.INVALID)
+            self.assertEqual(puzzles.grid(3), self.diagonal_grid)
+            self.assertEqual([index for index, grid in puzzles.grids()], [0, 2, 3])
+            record = puzzles.record(0)
+            self.assertEqual(packed.RECORD_HEADER.unpack(record[:packed.RECORD_HEADER.size]),
+                             (packed.UNSOLVED, 0, 81 - self.diagonal_grid.count('.')))
+            record.release()
+            self.assertRaises(IndexError, puzzles.grid, 4)
+
+    def test_not_packed(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a packed file')
+        self.assertRaises(ValueError, packed.PackedFile, self.path)
+
+    def test_solve_in_place(self):
+        self.assertEqual(packed.solve_file(self.path, engine='bitmask'), 3)
+        with packed.PackedFile(self.path) as puzzles:
+            self.assertEqual(puzzles.solution(0), self.solved_grid)
+            self.assertEqual(puzzles.status(2), packed.UNSOLVABLE)
+            self.assertIsNone(puzzles.solution(2))
+            self.assertEqual(puzzles.solution(3), self.solved_grid)
+        #Solved records are left alone when solving again
+        self.assertEqual(packed.solve_file(self.path, engine='bitmask'), 0)
+        lines = list(packed.unpack_lines(self.path))
+        self.assertEqual(lines[0], '%s\tsolved\t%s\n' % (self.diagonal_grid, self.solved_grid))
+        self.assertEqual(lines[2].split('\t')[1], 'unsolvable')
+
+    @unittest.skipIf(vectorized.np is None, 'numpy is not installed')
+    def test_solve_vectorized(self):
+        with packed.PackedFile(self.path) as puzzles:
+            digits = puzzles.digits()
+            self.assertEqual(''.join(str(d) for d in digits[0]), self.diagonal_grid.replace('.', '0'))
+            del digits
+        self.assertEqual(packed.solve_file(self.path, engine='vectorized'), 3)
+        with packed.PackedFile(self.path) as puzzles:
+            self.assertEqual(puzzles.solution(0), self.solved_grid)
+            self.assertEqual(puzzles.status(2), packed.UNSOLVABLE)
+
+if __name__ == '__main__':
+    unittest.main()
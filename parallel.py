@@ -0,0 +1,182 @@
+"""
+Parallel search of a single puzzle across a pool of worker processes.
+
+The search tree is expanded breadth first from the top, branching on the
+box with the fewest possible digits as bitmask.search does, until there is
+a frontier of several subproblems per worker. Each subproblem is searched by
+a worker with the bitmask engine. A worker that visits more than its budget
+of nodes hands the branches it has not yet tried back to be shared out
+again, so one large subtree can't hold up the rest. As soon as any worker
+finds a solution the others are told to stop.
+"""
+import multiprocessing
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+
+import bitmask
+import geometry
+
+#Outcome of each task handed to a worker
+SOLVED = 'solved'
+EXHAUSTED = 'exhausted'
+SPLIT = 'split'
+CANCELLED = 'cancelled'
+
+#Nodes a worker visits between checks for cancellation
+CHECK_EVERY = 32
+
+#The solve each worker is working for, shared with the pool
+current = None
+
+def init_worker(shared):
+    """Keep the shared solve counter in each worker process."""
+    global current
+    current = shared
+
+def frontier(masks, board, width):
+    """
+    Expand the search tree breadth first until it has at least width open
+    subproblems or every branch is exhausted.
+    Returns:
+        the list of subproblems, which together hold every solution, and the
+        solved masks if one was found while expanding, else None.
+    """
+    open_problems = [masks]
+    while open_problems and len(open_problems) < width:
+        masks = bitmask.reduce_puzzle(open_problems.pop(0), board)
+        if masks is False:
+            continue
+        s = bitmask.choose_box(masks)
+        if s is None:
+            return [], masks
+        open_problems.extend(bitmask.branches(masks, s))
+    return open_problems, None
+
+def explore(generation, masks, n, budget):
+    """
+    Search one subproblem depth first with an explicit stack.
+    Returns:
+        (generation, status, payload), where payload is the solved masks if
+        the status is SOLVED, and the untried subproblems left on the stack
+        if the budget ran out and the status is SPLIT.
+    """
+    board = geometry.board(n)
+    stack = [masks]
+    nodes = 0
+    while stack:
+        if nodes % CHECK_EVERY == 0 and current.value != generation:
+            return generation, CANCELLED, None
+        masks = bitmask.reduce_puzzle(stack.pop(), board)
+        nodes += 1
+        if masks is False:
+            continue
+        s = bitmask.choose_box(masks)
+        if s is None:
+            return generation, SOLVED, masks
+        #Pushed in reverse so the lowest digit is tried first, as in bitmask.search
+        stack.extend(reversed(bitmask.branches(masks, s)))
+        if nodes >= budget and len(stack) > 1:
+            return generation, SPLIT, stack
+    return generation, EXHAUSTED, None
+
+
+class ParallelSolver:
+    """
+    A pool of worker processes for solving one hard puzzle at a time.
+    Args:
+        processes(int): the number of workers, None for one per CPU.
+        budget(int): the search nodes a worker visits before handing the
+            rest of its subtree back to be split up.
+        width(int): subproblems made per worker before the search is handed
+            to the pool.
+
+    Use as a context manager, or call close, so the workers are shut down.
+    The pool can't be started from within a daemonic worker process, such as
+    those of batch.py, and a worker that dies fails the solve it was on with
+    BrokenProcessPool rather than leaving it waiting.
+    """
+    def __init__(self, processes=None, budget=2000, width=4):
+        if multiprocessing.current_process().daemon:
+            raise ValueError("The parallel engine starts its own pool, so it can't run inside a pool worker")
+        self.processes = processes or os.cpu_count() or 1
+        self.budget = budget
+        self.width = width
+        self.generation = multiprocessing.Value('i', 0)
+        self.pool = ProcessPoolExecutor(self.processes, initializer=init_worker, initargs=(self.generation,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop every worker, once any search still running has seen it was cancelled."""
+        self.pool.shutdown(cancel_futures=True)
+
+    def solve_masks(self, masks, board):
+        """
+        Search for a solution to a list of masks on a board across the pool.
+        Returns:
+            the solved masks, or False if there is no solution.
+        """
+        problems, solved = frontier(masks, board, self.width * self.processes)
+        if solved is not None:
+            return solved
+        with self.generation.get_lock():
+            self.generation.value += 1
+            generation = self.generation.value
+        #A fresh queue for each solve, so results of cancelled tasks from an
+        #earlier solve are never read
+        results = queue.Queue()
+        def submit(problem):
+            future = self.pool.submit(explore, generation, problem, board.n, self.budget)
+            future.add_done_callback(results.put)
+        try:
+            for problem in problems:
+                submit(problem)
+            pending = len(problems)
+            while pending:
+                #Raises the worker's exception, or BrokenProcessPool if it died
+                result = results.get().result()
+                pending -= 1
+                status, payload = result[1:]
+                if status == SOLVED:
+                    return payload
+                if status == SPLIT:
+                    for problem in payload:
+                        submit(problem)
+                    pending += len(payload)
+            return False
+        finally:
+            #Tell workers still on this solve to stop
+            with self.generation.get_lock():
+                if self.generation.value == generation:
+                    self.generation.value += 1
+
+    def solve(self, grid, board=None):
+        """
+        Find the solution to a Sudoku grid, searching its subtrees in parallel.
+        Args:
+            grid(string): a grid in string form, with any character other than
+                a digit of the board for unknown boxes.
+            board(Board): the geometry.Board to solve on, found from the length
+                of the grid if not given.
+        Returns:
+            The dictionary representation of the final sudoku grid. False if no solution exists.
+        """
+        if board is None:
+            board = geometry.board_for_grid(grid)
+        masks = self.solve_masks(board.grid_masks(grid), board)
+        if masks is False:
+            return False
+        return board.masks_values(masks)
+
+def solve(grid, processes=None, board=None):
+    """
+    Solve one grid on a pool started for it. To solve several puzzles, keep
+    a ParallelSolver open instead so the pool is only started once.
+    """
+    with ParallelSolver(processes) as solver:
+        return solver.solve(grid, board)
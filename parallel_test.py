@@ -0,0 +1,58 @@
+import os
+import signal
+from concurrent.futures.process import BrokenProcessPool
+
+import bitmask
+import benchmark
+import geometry
+import parallel
+import solution
+import solution_test
+import unittest
+
+
+class TestFrontier(unittest.TestCase):
+    grid = benchmark.load_puzzles('hard.txt')[0]
+
+    def test_frontier_covers_solution(self):
+        board = geometry.board(3)
+        problems, solved = parallel.frontier(board.grid_masks(self.grid), board, 8)
+        self.assertIsNone(solved)
+        self.assertGreaterEqual(len(problems), 8)
+        expected = bitmask.search(board.grid_masks(self.grid))
+        self.assertEqual(sum(1 for p in problems if bitmask.search(p) == expected), 1)
+
+
+class TestParallelSolver(unittest.TestCase):
+    grid = benchmark.load_puzzles('hard.txt')[0]
+
+    def test_solves_like_bitmask(self):
+        with parallel.ParallelSolver(processes=2) as solver:
+            self.assertEqual(solver.solve(solution_test.TestDiagonalSudoku.diagonal_grid),
+                             solution_test.TestDiagonalSudoku.solved_diag_sudoku)
+            self.assertEqual(solver.solve(self.grid), bitmask.solve(self.grid))
+            self.assertFalse(solver.solve('11' + '.' * 79))
+
+    def test_split_subtrees(self):
+        #A budget of one node splits at every branch point
+        with parallel.ParallelSolver(processes=2, budget=1, width=1) as solver:
+            self.assertEqual(solver.solve(self.grid), bitmask.solve(self.grid))
+
+    def test_dead_worker_fails_solve(self):
+        with parallel.ParallelSolver(processes=2, budget=1, width=1) as solver:
+            solver.solve(self.grid)
+            os.kill(next(iter(solver.pool._processes)), signal.SIGKILL)
+            with self.assertRaises(BrokenProcessPool):
+                solver.solve(self.grid)
+
+    def test_larger_board(self):
+        grid = benchmark.size_puzzles(4, 1)[0]
+        board = geometry.board(4)
+        values = solution.solve(grid, engine='parallel')
+        masks = [board.digit_mask[values[box]] for box in board.boxes]
+        #A complete grid with a repeated digit in a unit fails to reduce
+        self.assertEqual(bitmask.reduce_puzzle(masks[:], board), masks)
+        self.assertTrue(all(c == '.' or c == values[box] for c, box in zip(grid, board.boxes)))
+
+if __name__ == '__main__':
+    unittest.main()
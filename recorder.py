@@ -0,0 +1,86 @@
+"""
+Opt-in recording of the changes made to a puzzle while it is solved.
+
+A Recorder is passed to solve(grid, recorder=...) and stores each change as
+a compact (box, old, new) delta rather than a copy of the whole puzzle, so
+the solve can be replayed later by visualize_assignments.
+"""
+from collections import deque
+
+def solved_frames(values_list):
+    """
+    Yield each puzzle in a sequence that has a box solved differently from
+    the puzzle before it, in a single pass that only compares each box with
+    its value in the previous puzzle.
+    """
+    last = None
+    for values in values_list:
+        if last is not None and any(len(value) == 1 and last.get(box) != value for box, value in values.items()):
+            yield values
+        last = values
+
+
+class Recorder:
+    """
+    Record the changes made to a puzzle as (box, old, new) deltas.
+    Args:
+        maxlen(int): keep only the most recent maxlen deltas, or None to keep
+            them all. Older deltas are folded into the starting state, so a
+            bounded recording still replays correctly from where it begins.
+    """
+    def __init__(self, maxlen=None):
+        self.maxlen = maxlen
+        self.deltas = deque()
+        #The puzzle before the oldest delta kept, and after the newest
+        self.base = {}
+        self.current = {}
+
+    def start(self, values):
+        """Begin a new recording from the given puzzle state."""
+        self.deltas.clear()
+        self.base = values.copy()
+        self.current = values.copy()
+
+    def record(self, box, old, new):
+        """Record a box changing from old to new."""
+        if old == new:
+            return
+        if self.maxlen is not None and len(self.deltas) >= self.maxlen:
+            first_box, first_old, first_new = self.deltas.popleft()
+            self.base[first_box] = first_new
+        self.deltas.append((box, old, new))
+        self.current[box] = new
+
+    def restore(self, values):
+        """
+        Record the changes needed to bring the recorded state back to values,
+        used when a search abandons a copy of the puzzle and carries on with
+        an earlier one.
+        """
+        for box, value in values.items():
+            if self.current[box] != value:
+                self.record(box, self.current[box], value)
+
+    def replay(self):
+        """
+        Yield the recorded deltas one by one along with the puzzle state after
+        each has been applied. The same state dictionary is updated and
+        yielded each time, so copy it to keep it.
+        """
+        state = self.base.copy()
+        for box, old, new in self.deltas:
+            state[box] = new
+            yield box, old, new, state
+
+    def frames(self, copy=True):
+        """
+        Yield the puzzle each time a box is newly solved. With copy=False the
+        same state dictionary is yielded each time, which is enough for a
+        consumer that draws each frame before asking for the next.
+        """
+        for box, old, new, state in self.replay():
+            if len(new) == 1:
+                yield state.copy() if copy else state
+
+    def __len__(self):
+        return len(self.deltas)
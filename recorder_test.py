@@ -0,0 +1,56 @@
+import recorder
+import solution
+import solution_test
+import unittest
+
+
+class TestRecorder(solution_test.DiagonalPuzzle, unittest.TestCase):
+
+    def replay_final(self, r):
+        state = None
+        for box, old, new, state in r.replay():
+            pass
+        return state
+
+    def test_replay(self):
+        for backtracking in ('copy', 'trail'):
+            r = recorder.Recorder()
+            solution.solve(self.diagonal_grid, backtracking=backtracking, recorder=r)
+            self.assertEqual(self.replay_final(r), self.solved_diag_sudoku)
+
+    def test_bounded(self):
+        r = recorder.Recorder(maxlen=50)
+        solution.solve(self.diagonal_grid, recorder=r)
+        self.assertEqual(len(r), 50)
+        self.assertEqual(self.replay_final(r), self.solved_diag_sudoku)
+
+    def test_deltas(self):
+        r = recorder.Recorder()
+        r.start({'A1': '12', 'A2': '3'})
+        r.record('A1', '12', '1')
+        r.record('A2', '3', '3')
+        self.assertEqual(list(r.deltas), [('A1', '12', '1')])
+        self.assertEqual(list(r.frames()), [{'A1': '1', 'A2': '3'}])
+
+    def test_solved_frames(self):
+        frames = [{'A1': '12', 'A2': '3'}, {'A1': '1', 'A2': '3'}, {'A1': '1', 'A2': '3'}, {'A1': '2', 'A2': '3'}]
+        self.assertEqual(list(recorder.solved_frames(iter(frames))), [frames[1], frames[3]])
+
+    def test_restore(self):
+        r = recorder.Recorder()
+        r.start({'A1': '12', 'A2': '3'})
+        r.record('A1', '12', '1')
+        r.restore({'A1': '12', 'A2': '3'})
+        self.assertEqual(r.current, {'A1': '12', 'A2': '3'})
+        self.assertEqual(list(r.deltas)[-1], ('A1', '1', '12'))
+
+    def test_disabled(self):
+        solution.solve(self.diagonal_grid)
+        self.assertIsNone(solution.active_recorder)
+
+    def test_bitmask_cannot_record(self):
+        with self.assertRaises(ValueError):
+            solution.solve(self.diagonal_grid, engine='bitmask', recorder=recorder.Recorder())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,365 @@
+"""
+An asyncio solver service on a local TCP or Unix socket.
+
+Each request is a line holding an 81 character puzzle, optionally after an
+id and a tab. Each reply is a tab separated line of the id, the status and
+the solved grid, the id being the request's line number on the connection
+if none was given. Requests on one connection are answered as they finish,
+so replies can come back out of order. Two other lines are understood:
+
+    cancel <id>     drop a request, which is answered as cancelled
+    stats           reply with the server metrics as a line of JSON
+
+Requests arriving within a short window are gathered into micro-batches and
+solved by a pool of worker processes, so the event loop never solves
+anything itself. At most max_pending requests are in flight at once, after
+which the server stops reading from its connections until some finish, and
+a request not answered within its timeout is answered as timeout. A request
+that fails in its worker is answered as error.
+
+Run with:
+    python server.py --port 8765 [-p processes]
+    python server.py --unix /tmp/sudoku.sock
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from utils import boxes
+import batch
+import solution
+
+TIMEOUT = 'timeout'
+CANCELLED = 'cancelled'
+ERROR = 'error'
+
+def solve_request(line, seconds=None, max_nodes=None, options=None):
+    """
+    Solve one puzzle line, returning its status and solved grid, None unless
+    solved. The string engine solves within the time and node budget if one
+    is given, and the status may then be BUDGET_EXCEEDED. Other engines can't
+    be stopped part way, so they are given no time budget.
+    """
+    options = options or {}
+    if options.get('engine', 'string') != 'string' or (seconds is None and max_nodes is None):
+        result = batch.solve_line((0, line), options)
+        return result.status, result.solution
+    grid = batch.parse_line(line)
+    if grid is None:
+        return batch.INVALID, None
+    deadline = None if seconds is None else max(seconds, 0)
+    result = solution.solve(grid, max_nodes=max_nodes, deadline=deadline, **options)
+    if result.status != solution.SOLVED:
+        return result.status, None
+    return result.status, ''.join(result.values[box] for box in boxes)
+
+def solve_requests(requests, max_nodes=None, options=None):
+    """
+    Solve a micro-batch of (line, seconds) requests in a worker process,
+    seconds being the time each had left when the batch was sent, or None.
+    Time spent on earlier puzzles of the batch counts against later ones.
+    """
+    start = time.perf_counter()
+    results = []
+    for line, seconds in requests:
+        if seconds is not None:
+            seconds -= time.perf_counter() - start
+        results.append(solve_request(line, seconds, max_nodes, options))
+    return results
+
+
+class ServerMetrics:
+    """
+    Throughput and latency of a server.
+    Args:
+        window(int): the number of recent request latencies percentiles are
+            taken over.
+    """
+    def __init__(self, window=10000):
+        self.started = time.perf_counter()
+        self.statuses = Counter()
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.in_flight = 0
+        self.batches = 0
+        self.batched = 0
+
+    def add_request(self):
+        self.requests += 1
+        self.in_flight += 1
+
+    def add_reply(self, status, seconds):
+        self.in_flight -= 1
+        self.statuses[status] += 1
+        self.latencies.append(seconds)
+
+    def add_batch(self, size):
+        self.batches += 1
+        self.batched += size
+
+    def info(self):
+        """The counters as a dictionary, with latency percentiles in seconds and replies per second."""
+        latencies = sorted(self.latencies)
+        def percentile(p):
+            return latencies[min(int(p * len(latencies)), len(latencies) - 1)] if latencies else 0.0
+        uptime = time.perf_counter() - self.started
+        replies = sum(self.statuses.values())
+        return {
+            'requests': self.requests,
+            'replies': replies,
+            'in_flight': self.in_flight,
+            'statuses': dict(self.statuses),
+            'batches': self.batches,
+            'mean_batch': float(self.batched) / self.batches if self.batches else 0.0,
+            'throughput': replies / uptime if uptime else 0.0,
+            'latency_p50': percentile(0.5),
+            'latency_p90': percentile(0.9),
+            'latency_p99': percentile(0.99),
+            'latency_max': latencies[-1] if latencies else 0.0,
+            'uptime': uptime,
+        }
+
+
+class SolverServer:
+    """
+    Serve solve requests over a socket from a pool of worker processes.
+    Args:
+        processes(int): the number of worker processes, None for one per CPU.
+        window(float): how long in seconds the first request of a batch waits
+            for others to join it.
+        batch_size(int): the most requests sent to a worker at once. A batch
+            is sent as soon as it is full.
+        max_pending(int): the most requests in flight across every
+            connection before reading stops.
+        timeout(float): seconds a request may take from arriving to being
+            answered, None for no limit. It is also the worker's time budget
+            for the puzzle, so it needs the string engine, the only one that
+            can be stopped part way. Other engines run each puzzle to the end
+            and are served with timeout=None.
+        max_nodes(int): an optional search node budget for each puzzle,
+            which needs the string engine.
+        options: keyword arguments passed on to solution.solve, such as the
+            engine. They are checked when the server is made, so options
+            that can't be used raise ValueError then rather than failing
+            every request.
+
+    Start it with start_tcp or start_unix from a running event loop, and
+    close it when done.
+    """
+    def __init__(self, processes=None, window=0.002, batch_size=64, max_pending=1024, timeout=1.0, max_nodes=None,
+                 **options):
+        engine = options.get('engine', 'string')
+        if engine == 'parallel':
+            raise ValueError("The parallel engine runs its own pool and can't be served from workers")
+        if engine != 'string' and engine not in solution.engines:
+            raise ValueError("Unknown engine: %r" % engine)
+        if max_nodes is not None and engine != 'string':
+            raise ValueError("A node budget needs the string engine")
+        if timeout is not None and engine != 'string':
+            #A slow puzzle would keep its worker busy after being answered,
+            #so a few of them could leave every later request to time out
+            raise ValueError("A timeout needs the string engine, serve the %s engine with timeout=None" % engine)
+        if engine == 'string' and (timeout is not None or max_nodes is not None):
+            #A budget of no nodes checks the options without solving anything
+            solution.solve('.' * 81, max_nodes=0, **options)
+        #Spawned rather than forked, so workers started once connections are
+        #open do not hold copies of their sockets, which would stop a closed
+        #connection from reaching the client
+        self.executor = ProcessPoolExecutor(processes or os.cpu_count() or 1,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        self.window = window
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_nodes = max_nodes
+        self.options = options
+        self.slots = asyncio.Semaphore(max_pending)
+        self.metrics = ServerMetrics()
+        #Requests waiting for the current batch to be sent, as (line, arrival, future)
+        self.queue = []
+        self.timer = None
+        self.servers = []
+
+    async def start_tcp(self, host='127.0.0.1', port=0):
+        """Listen on a TCP port, 0 for any free port. Returns the asyncio server."""
+        server = await asyncio.start_server(self.handle, host, port)
+        self.servers.append(server)
+        return server
+
+    async def start_unix(self, path):
+        """Listen on a Unix socket at path. Returns the asyncio server."""
+        server = await asyncio.start_unix_server(self.handle, path)
+        self.servers.append(server)
+        return server
+
+    async def close(self):
+        """Stop listening, wait for open connections to close and shut the worker pool down."""
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        if self.timer is not None:
+            self.timer.cancel()
+        #Waiting for the workers to exit blocks, so it is done off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, partial(self.executor.shutdown, cancel_futures=True))
+
+    def solve(self, line):
+        """
+        Queue a puzzle line for the next batch, returning a future for its
+        (status, solution) pair. Cancelling the future before the batch is
+        sent drops the request from it.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.queue.append((line, time.perf_counter(), future))
+        if len(self.queue) >= self.batch_size:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        """Send the queued requests that are still wanted to the worker pool as one batch."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        queued = [item for item in self.queue if not item[2].done()]
+        self.queue = []
+        if not queued:
+            return
+        now = time.perf_counter()
+        requests = [(line, None if self.timeout is None else self.timeout - (now - arrival))
+                    for line, arrival, future in queued]
+        self.metrics.add_batch(len(requests))
+        futures = [future for line, arrival, future in queued]
+        try:
+            pending = asyncio.get_running_loop().run_in_executor(
+                self.executor, solve_requests, requests, self.max_nodes, self.options)
+        except Exception as e:
+            #The pool is broken or shut down, fail the batch rather than leave it waiting
+            for future in futures:
+                future.set_exception(e)
+            return
+        pending.add_done_callback(lambda done: self.deliver(done, futures))
+
+    def deliver(self, done, futures):
+        """Hand the results of a finished batch to the requests still waiting for them."""
+        if done.cancelled():
+            results = [(CANCELLED, None)] * len(futures)
+        elif done.exception() is not None:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(done.exception())
+            return
+        else:
+            results = done.result()
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def answer(self, request_id, future, reply):
+        """Wait for a request's result, or its timeout, and reply with it. Returns the status."""
+        try:
+            status, solved = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            status, solved = TIMEOUT, None
+        except Exception:
+            status, solved = ERROR, None
+        await reply('%s\t%s\t%s\n' % (request_id, status, solved or ''))
+        return status
+
+    def finished(self, task, start):
+        """Free a request's slot and record its reply once its task is done, however it ended."""
+        self.slots.release()
+        status = CANCELLED if task.cancelled() or task.exception() is not None else task.result()
+        self.metrics.add_reply(status, time.perf_counter() - start)
+
+    async def handle(self, reader, writer):
+        """Serve one connection until the client closes it."""
+        lock = asyncio.Lock()
+        tasks = set()
+        #The future of each request in flight by id, for cancel
+        futures = {}
+
+        async def reply(text):
+            async with lock:
+                writer.write(text.encode())
+                await writer.drain()
+
+        number = -1
+        try:
+            while True:
+                data = await reader.readline()
+                if not data:
+                    break
+                number += 1
+                line = data.decode(errors='replace').strip()
+                if not line:
+                    continue
+                if line == 'stats':
+                    await reply(json.dumps(self.metrics.info()) + '\n')
+                    continue
+                if line.startswith('cancel '):
+                    future = futures.get(line[len('cancel '):].strip())
+                    if future is not None and not future.done():
+                        future.set_result((CANCELLED, None))
+                    continue
+                request_id, tab, grid = line.rpartition('\t')
+                request_id = request_id if tab else str(number)
+                #Stop reading once too many requests are in flight
+                await self.slots.acquire()
+                self.metrics.add_request()
+                start = time.perf_counter()
+                future = futures[request_id] = self.solve(grid)
+                task = asyncio.ensure_future(self.answer(request_id, future, reply))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda done, start=start: self.finished(done, start))
+                future.add_done_callback(lambda done, request_id=request_id:
+                                         futures.pop(request_id) if futures.get(request_id) is done else None)
+            #The client has finished sending, answer what it is still waiting for
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, asyncio.CancelledError):
+            for task in tasks:
+                task.cancel()
+        finally:
+            writer.close()
+
+async def serve(args):
+    server = SolverServer(args.processes, args.window, args.batch_size, args.max_pending,
+                          args.timeout or None, args.max_nodes, engine=args.engine)
+    if args.unix:
+        await server.start_unix(args.unix)
+    else:
+        await server.start_tcp(args.host, args.port)
+    try:
+        await asyncio.gather(*(s.serve_forever() for s in server.servers))
+    finally:
+        await server.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve diagonal sudoku solves over a local socket.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port to listen on')
+    parser.add_argument('--unix', default=None, help='listen on this Unix socket path instead of TCP')
+    parser.add_argument('-p', '--processes', type=int, default=None, help='worker processes, default one per CPU')
+    parser.add_argument('--window', type=float, default=0.002, help='seconds to gather a batch')
+    parser.add_argument('--batch-size', type=int, default=64, help='most puzzles sent to a worker at once')
+    parser.add_argument('--max-pending', type=int, default=1024, help='most requests in flight')
+    parser.add_argument('--timeout', type=float, default=1.0,
+                        help='seconds per request, 0 for no limit, which other engines than string need')
+    parser.add_argument('--max-nodes', type=int, default=None, help='search nodes per puzzle, string engine only')
+    parser.add_argument('--engine', default='string', help='engine passed to solve')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+
+from unittest import mock
+
+import benchmark
+import server
+import solution_test
+import strategies
+import unittest
+
+
+class TestSolveRequests(solution_test.DiagonalPuzzle, unittest.TestCase):
+
+    def test_engine_reaches_solver(self):
+        engine = mock.Mock(return_value=self.solved_diag_sudoku)
+        with mock.patch.dict(server.solution.engines, bitmask=engine):
+            results = server.solve_requests([(self.diagonal_grid, None)], None, {'engine': 'bitmask'})
+        engine.assert_called_once_with(self.diagonal_grid)
+        self.assertEqual(results[0][0], server.batch.SOLVED)
+
+    def test_string_engine_options_reach_solver(self):
+        status, solved = server.solve_request(self.diagonal_grid, 1.0, None, {'engine': 'string', 'backtracking': 'trail'})
+        self.assertEqual(status, server.batch.SOLVED)
+        with self.assertRaises(ValueError):
+            server.solve_request(self.diagonal_grid, 1.0, None, {'backtracking': 'nope'})
+
+    def test_rejects_options_at_startup(self):
+        for options in ({'engine': 'bitmask', 'max_nodes': 10, 'timeout': None}, {'engine': 'bitmask'},
+                        {'engine': 'parallel', 'timeout': None}, {'engine': 'nope', 'timeout': None},
+                        {'engine': 'string', 'strategies': strategies.ADVANCED}):
+            with self.assertRaises(ValueError):
+                server.SolverServer(processes=1, **options)
+
+
+class TestSolverServer(solution_test.DiagonalPuzzle, unittest.IsolatedAsyncioTestCase):
+    hard_grid = benchmark.load_puzzles('hard.txt')[0]
+
+    async def start(self, **options):
+        self.server = server.SolverServer(processes=1, **options)
+        listener = await self.server.start_tcp()
+        return await asyncio.open_connection('127.0.0.1', listener.sockets[0].getsockname()[1])
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_solve(self):
+        reader, writer = await self.start()
+        writer.write(('%s\nnot a puzzle\n\na\t%s\n' % (self.diagonal_grid, '11' + '.' * 79)).encode())
+        writer.write_eof()
+        replies = sorted(line.decode().rstrip('\n').split('\t') for line in (await reader.read()).splitlines(True))
+        writer.close()
+        self.assertEqual(replies, [
+            ['0', server.batch.SOLVED, self.solved_grid],
+            ['1', server.batch.INVALID, ''],
+            ['a', server.batch.UNSOLVABLE, ''],
+        ])
+        self.assertEqual(self.server.metrics.info()['replies'], 3)
+
+    async def test_node_budget(self):
+        reader, writer = await self.start(max_nodes=1)
+        writer.write(('%s\n' % self.hard_grid).encode())
+        self.assertEqual((await reader.readline()).decode(), '0\t%s\t\n' % server.solution.BUDGET_EXCEEDED)
+        writer.close()
+
+    async def test_timeout(self):
+        reader, writer = await self.start(timeout=0.001)
+        writer.write(('%s\n' % self.hard_grid).encode())
+        self.assertEqual((await reader.readline()).decode(), '0\t%s\t\n' % server.TIMEOUT)
+        writer.close()
+
+    async def test_cancel(self):
+        reader, writer = await self.start(window=1.0)
+        writer.write(('h\t%s\ncancel h\n' % self.hard_grid).encode())
+        self.assertEqual((await reader.readline()).decode(), 'h\t%s\t\n' % server.CANCELLED)
+        writer.close()
+
+    async def test_backpressure(self):
+        reader, writer = await self.start(max_pending=1, window=0)
+        writer.write((self.diagonal_grid + '\n').encode() * 5)
+        writer.write_eof()
+        replies = (await reader.read()).decode().splitlines()
+        writer.close()
+        self.assertEqual(sorted(reply.split('\t')[0] for reply in replies), ['0', '1', '2', '3', '4'])
+        self.assertEqual(self.server.metrics.info()['mean_batch'], 1.0)
+
+    async def test_stats(self):
+        reader, writer = await self.start()
+        writer.write(('%s\n' % self.diagonal_grid).encode())
+        await reader.readline()
+        writer.write(b'stats\n')
+        info = json.loads(await reader.readline())
+        writer.close()
+        self.assertEqual(info['requests'], 1)
+        self.assertEqual(info['statuses'], {server.batch.SOLVED: 1})
+        self.assertGreater(info['latency_max'], 0)
+
+    async def test_unix_socket(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'sudoku.sock')
+        self.server = server.SolverServer(processes=1)
+        await self.server.start_unix(path)
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(('%s\n' % self.diagonal_grid).encode())
+        self.assertEqual((await reader.readline()).decode(), '0\tsolved\t%s\n' % self.solved_grid)
+        writer.close()
+
+if __name__ == '__main__':
+    unittest.main()
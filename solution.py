@@ -1,16 +1,47 @@
+from collections import deque, namedtuple
+from functools import partial
+import time
+
 from utils import *
+import bitmask
+import dlx
+import heuristics
+import parallel
+from recorder import Recorder
+from transposition import state_key, update_key, zobrist
+
+#Alternative engines solve can hand a grid to, each returning the same
+#dictionary shape as search
+engines = {'bitmask': bitmask.solve, 'dlx': dlx.solve, 'parallel': parallel.solve}
+
+#Recorder for the solve in progress, set by solve when recording is asked for.
+#Only one recorded solve can run at a time within a process.
+active_recorder = None
+
+#Outcomes of a solve with a budget
+SOLVED = 'solved'
+UNSOLVABLE = 'unsolvable'
+BUDGET_EXCEEDED = 'budget_exceeded'
 
-#Array for storing moves for visualisation in pygame
-assignments = []
+#The result of a solve with a budget. values is the solution once solved,
+#the reduced state with the fewest possible values left when the budget ran
+#out, and None when there is no solution. A state reached after guessing
+#may have ruled out the solution.
+SolveResult = namedtuple('SolveResult', ['status', 'values', 'nodes', 'seconds'])
+
+#Indices into unit_list of the units each box belongs to, so changed units
+#can be queued by number during worklist propagation
+box_units = dict((s, [i for i, u in enumerate(unit_list) if s in u]) for s in boxes)
 
 def assign_value(values, box, value):
     """
     Assign an updated value to a box within the puzzle, while recording this
-    assignment for later visualisation in pygame.
+    assignment for later visualisation in pygame if a recorder was passed to
+    solve.
     """
+    if active_recorder is not None:
+        active_recorder.record(box, values[box], value)
     values[box] = value
-    if len(value) == 1:
-        assignments.append(values.copy())
     return values
 
 def naked_twins(values):
@@ -42,6 +73,9 @@ def eliminate_twins(values,pairs):
     The values can then be crossed off from the peers.
     """
     for pair in pairs:
+        #Skip pairs broken up by an earlier elimination in this unit
+        if len(values[pair[0]]) != 2 or values[pair[0]] != values[pair[1]]:
+            continue
         #Creates a set of shared peers
         twin_peers = set(peers[pair[0]]) & set(peers[pair[1]])
         #For each of these peers remove the values from the twin boxes
@@ -110,20 +144,33 @@ def only_choice(values):
                 assign_value(values,dplaces[0],digit)
     return values
 
-def reduce_puzzle(values):
+def reduce_puzzle(values, stats=None, strategies=None):
     """
     Repeat each strategy to reduce the possible values for each box of the puzzle,
     exiting if all boxes are solved, the solution stalls or if the puzzle 
     becomes unsolvable.
+    If a stats.SolveStats is given, each pass and strategy is recorded on it.
+    strategies is an optional list of strategies, such as those in
+    strategies.py, to use in place of eliminate, only_choice and
+    naked_twins, see reduce_with. Those stop only once no possible value at
+    all is removed, since the stronger strategies often remove values
+    without solving a box.
     """
+    if strategies is not None:
+        return reduce_with(values, strategies, stats)
     stalled = False
     while not stalled:
         # Check how many boxes have a determined value
         solved_values_before = len([box for box in values.keys() if len(values[box]) == 1])
 
-        values = eliminate(values)
-        values = only_choice(values)
-        values = naked_twins(values)
+        if stats is None:
+            values = eliminate(values)
+            values = only_choice(values)
+            values = naked_twins(values)
+        else:
+            stats.add_pass()
+            for strategy in (eliminate, only_choice, naked_twins):
+                values = stats.run_strategy(strategy, values)
         
         # Check how many boxes have a determined value, to compare
         solved_values_after = len([box for box in values.keys() if len(values[box]) == 1])
@@ -135,7 +182,118 @@ def reduce_puzzle(values):
             return False
     return values
 
-def search(values):
+def reduce_with(values, strategies, stats=None):
+    """
+    Apply a list of strategies, going back to the first whenever one removes
+    a possible value, so each strategy only runs once every strategy before
+    it has stalled. Returns the values once the last strategy stalls too, or
+    False if a box is left with no possible values.
+    eliminate is run first if the list leaves it out, as without it solved
+    boxes can clash with their peers unnoticed.
+    """
+    if eliminate not in strategies:
+        strategies = [eliminate] + list(strategies)
+    remaining = sum(len(value) for value in values.values())
+    i = 0
+    while i < len(strategies):
+        if stats is None:
+            values = strategies[i](values)
+        else:
+            if i == 0:
+                stats.add_pass()
+            values = stats.run_strategy(strategies[i], values)
+        after = sum(len(value) for value in values.values())
+        if after < remaining:
+            if any(len(value) == 0 for value in values.values()):
+                return False
+            remaining = after
+            i = 0
+        else:
+            i += 1
+    return values
+
+def remove_digit(values, box, digit, solved, dirty, trail=None):
+    """
+    Remove a digit from a box during worklist propagation, queueing the box if
+    it is now solved and marking each of its units as changed.
+    Returns the new value of the box, an empty string if the box has no
+    possible values left.
+    """
+    if trail is not None:
+        trail.append((box, values[box]))
+    value = values[box].replace(digit, "")
+    assign_value(values, box, value)
+    if len(value) == 1:
+        solved.append(box)
+    dirty.update(box_units[box])
+    return value
+
+def reduce_puzzle_worklist(values, changed=None, trail=None):
+    """
+    Reduce the possible values for each box of the puzzle, revisiting only
+    what is affected by the changed boxes rather than sweeping the whole board.
+    Args:
+        values(dict): a dictionary of the form {'box_name': '123456789', ...}
+        changed: the boxes that have changed since the puzzle was last reduced,
+            or None to start from every box.
+        trail: an optional list, to which the previous value of every box
+            changed is appended as a (box, value) pair so it can be undone.
+
+    Returns:
+        the reduced values dictionary, or False as soon as a box is left with
+        no possible values or a digit has no place left in a unit.
+
+    Newly solved boxes are queued and their digit eliminated from their peers.
+    Each unit holding a box that changed is then checked for only choices and
+    naked twins, which in turn queues any further boxes they solve.
+    """
+    if changed is None:
+        changed = boxes
+    solved = deque(box for box in changed if len(values[box]) == 1)
+    dirty = set(i for box in changed for i in box_units[box])
+    while solved or dirty:
+        #Eliminate the digits of newly solved boxes from their peers first
+        while solved:
+            box = solved.popleft()
+            digit = values[box]
+            for peer in peers[box]:
+                if digit in values[peer] and not remove_digit(values, peer, digit, solved, dirty, trail):
+                    return False
+        if not dirty:
+            break
+        unit = unit_list[dirty.pop()]
+        #Only choice within the changed unit
+        for digit in '123456789':
+            dplaces = [box for box in unit if digit in values[box]]
+            if len(dplaces) == 0:
+                return False
+            if len(dplaces) == 1 and len(values[dplaces[0]]) > 1:
+                if trail is not None:
+                    trail.append((dplaces[0], values[dplaces[0]]))
+                assign_value(values, dplaces[0], digit)
+                solved.append(dplaces[0])
+                dirty.update(box_units[dplaces[0]])
+        #Naked twins within the changed unit
+        twins = {}
+        for box in unit:
+            value = values[box]
+            if len(value) != 2:
+                continue
+            if value not in twins:
+                twins[value] = box
+                continue
+            for peer in peers[box] & peers[twins[value]]:
+                for digit in value:
+                    if digit in values[peer] and not remove_digit(values, peer, digit, solved, dirty, trail):
+                        return False
+    return values
+
+def has_clash(values):
+    """Whether any solved box holds the same digit as one of its peers."""
+    return any(len(values[s]) == 1 and values[p] == values[s] for s in boxes for p in peers[s])
+
+def search(values, propagation='sweep', changed=None, stats=None, depth=0, strategies=None, branching=None,
+           value_order=None):
     """
     Reduce possible values in the puzzle, before checking if puzzle is still 
     viable or if it is solved, if so exit.
@@ -143,41 +301,344 @@ def search(values):
     the reduction of possible values again. Recursion is used until the puzzle
     become unsolvable in which case another value is tried in the level above,
     until the puzzle is solved or all posibilities run out.
+
+    With propagation='worklist' each guess is reduced with
+    reduce_puzzle_worklist starting from the guessed box alone.
+    If a stats.SolveStats is given, each node, branch and backtrack is
+    recorded on it, depth being the number of guesses made so far.
+    With propagation='sweep', strategies is passed on to reduce_puzzle.
+    branching and value_order are optional heuristics from heuristics.py,
+    choosing the (box, digit) placements to branch on and the order to try
+    them in, in place of the box with fewest possible values in digit order.
     """
-    values = reduce_puzzle(values)
+    if stats is not None:
+        stats.add_node(depth)
+    if propagation == 'worklist':
+        if stats is None:
+            values = reduce_puzzle_worklist(values, changed)
+        else:
+            values = stats.run_strategy(partial(reduce_puzzle_worklist, changed=changed), values, 'worklist')
+    else:
+        values = reduce_puzzle(values, stats, strategies)
     if values == False:
         return False
     if len([box for box in values.keys() if len(values[box]) == 1]) == 81:
-        return values
+        return False if has_clash(values) else values
+    if branching is not None or value_order is not None:
+        return search_branches(values, propagation, stats, depth, strategies, branching, value_order)
     n,s = min((len(values[s]),s) for s in boxes if len(values[s]) > 1)
+    if stats is not None:
+        stats.add_branch(depth, n)
     for i in values[s]:
         new_values = values.copy()
         assign_value(new_values,s,i)
-        attempt = search(new_values) 
+        attempt = search(new_values, propagation, [s], stats, depth + 1, strategies)
+        if attempt:
+            return attempt
+        if stats is not None:
+            stats.add_backtrack(depth)
+        if active_recorder is not None:
+            active_recorder.restore(values)
+    return False
+
+def search_branches(values, propagation, stats, depth, strategies, branching, value_order):
+    """
+    Continue search from reduced, unsolved values by trying each placement
+    chosen by the branching heuristic, mrv if None, in the order given by
+    value_order.
+    """
+    branches = (branching or heuristics.mrv)(values)
+    if value_order is not None:
+        branches = value_order(values, branches)
+    if stats is not None:
+        stats.add_branch(depth, len(branches))
+    for box, digit in branches:
+        new_values = values.copy()
+        assign_value(new_values, box, digit)
+        attempt = search(new_values, propagation, [box], stats, depth + 1, strategies, branching, value_order)
         if attempt:
             return attempt
+        if stats is not None:
+            stats.add_backtrack(depth)
+        if active_recorder is not None:
+            active_recorder.restore(values)
+    return False
+
+def undo(values, trail, checkpoint):
+    """
+    Restore the value of every box changed since the trail was at the length
+    given by checkpoint, most recent change first.
+    """
+    while len(trail) > checkpoint:
+        box, value = trail.pop()
+        assign_value(values, box, value)
+    return values
+
+def search_trail(values, trail=None, changed=None, stats=None, depth=0, table=None, key=None):
+    """
+    Search for a solution by changing a single values dictionary in place.
 
-def solve(grid):
+    Every change made while reducing or guessing is recorded on the trail, so
+    when a guess fails the puzzle is restored by undoing back to the length
+    the trail had before the guess, rather than copying the whole puzzle for
+    each guess as search does. Propagation is always worklist driven.
+    Returns the solved values dictionary, or False if no solution exists, in
+    which case values is left in the state it was first passed in.
+    Statistics are recorded on stats if given, as in search.
+
+    If a transposition.TranspositionTable is given as table, each reduced
+    state is looked up by its Zobrist key and pruned if an earlier search
+    found it has no solution, and states found to have none are added. The
+    key is that of values as passed in, found in full if None.
+    """
+    if trail is None:
+        trail = []
+    start = len(trail)
+    if stats is None:
+        reduced = reduce_puzzle_worklist(values, changed, trail)
+    else:
+        stats.add_node(depth)
+        reduced = stats.run_strategy(partial(reduce_puzzle_worklist, changed=changed, trail=trail), values, 'worklist')
+    if reduced is False:
+        undo(values, trail, start)
+        return False
+    if table is not None:
+        key = state_key(values) if key is None else update_key(key, values, trail, start)
+        if table.is_dead(key):
+            undo(values, trail, start)
+            return False
+    choice = min(((len(values[s]), s) for s in boxes if len(values[s]) > 1), default=None)
+    if choice is None:
+        return values
+    n, s = choice
+    if stats is not None:
+        stats.add_branch(depth, n)
+    for digit in values[s]:
+        checkpoint = len(trail)
+        trail.append((s, values[s]))
+        assign_value(values, s, digit)
+        child_key = None if table is None else key ^ zobrist(s, trail[-1][1]) ^ zobrist(s, digit)
+        if search_trail(values, trail, [s], stats, depth + 1, table, child_key):
+            return values
+        if stats is not None:
+            stats.add_backtrack(depth)
+        undo(values, trail, checkpoint)
+    if table is not None:
+        table.add_dead(key)
+    undo(values, trail, start)
+    return False
+
+def count_trail(values, limit, trail, changed=None, found=0):
+    """
+    Search every branch in place as search_trail does, counting solutions on
+    from found until there are limit of them.
+    Siblings share the reduced values of their parent, each undoing only its
+    own changes, and values is left in the state it was passed in.
+    Returns found plus the number of solutions found.
+    """
+    start = len(trail)
+    if reduce_puzzle_worklist(values, changed, trail) is not False:
+        choice = min(((len(values[s]), s) for s in boxes if len(values[s]) > 1), default=None)
+        if choice is None:
+            found += 1
+        else:
+            s = choice[1]
+            for digit in values[s]:
+                if limit is not None and found >= limit:
+                    break
+                checkpoint = len(trail)
+                trail.append((s, values[s]))
+                assign_value(values, s, digit)
+                found = count_trail(values, limit, trail, [s], found)
+                undo(values, trail, checkpoint)
+    undo(values, trail, start)
+    return found
+
+def count_solutions(grid, limit=None):
+    """
+    Count the solutions of a Sudoku grid.
+    Args:
+        grid(string): a string representing a sudoku grid.
+        limit(int): stop searching once this many solutions are found, None
+            to count every solution.
+    Returns:
+        The number of solutions, at most limit.
+    """
+    return count_trail(grid_values(grid), limit, [])
+
+def is_unique(grid):
+    """Whether a Sudoku grid has exactly one solution, searching only until a second is found."""
+    return count_solutions(grid, limit=2) == 1
+
+def search_budget(values, max_nodes=None, deadline=None, stats=None):
+    """
+    Search in place with a trail as search_trail does, but from an explicit
+    stack rather than by recursion, stopping once a budget runs out.
+    Args:
+        values(dict): the unreduced puzzle, changed in place.
+        max_nodes(int): the most search nodes to reduce, None for no limit.
+        deadline(float): the time.perf_counter() value to stop at, None for
+            no limit.
+        stats(SolveStats): optional, recorded on as in search.
+    Returns:
+        a SolveResult. Its seconds field is left at 0 for solve to fill in.
+
+    The budget is checked before each node is reduced, so a search never
+    runs more than max_nodes reductions or more than one reduction past the
+    deadline, however deep the tree.
+    """
+    trail = []
+    #A frame for each guessed box: the box, its untried digits and the
+    #length of the trail before its first guess
+    stack = []
+    changed = None
+    nodes = 0
+    best = None
+    best_size = None
+    while True:
+        if (max_nodes is not None and nodes >= max_nodes) or \
+                (deadline is not None and time.perf_counter() >= deadline):
+            return SolveResult(BUDGET_EXCEEDED, best or values.copy(), nodes, 0)
+        nodes += 1
+        if stats is None:
+            reduced = reduce_puzzle_worklist(values, changed, trail)
+        else:
+            stats.add_node(len(stack))
+            reduced = stats.run_strategy(partial(reduce_puzzle_worklist, changed=changed, trail=trail), values,
+                                         'worklist')
+        if reduced is not False:
+            choice = min(((len(values[s]), s) for s in boxes if len(values[s]) > 1), default=None)
+            if choice is None:
+                return SolveResult(SOLVED, values, nodes, 0)
+            size = sum(len(value) for value in values.values())
+            if best is None or size < best_size:
+                best = values.copy()
+                best_size = size
+            n, s = choice
+            if stats is not None:
+                stats.add_branch(len(stack), n)
+            stack.append((s, iter(values[s]), len(trail)))
+        #Back up to the deepest box with a digit left to try
+        while stack:
+            s, untried, checkpoint = stack[-1]
+            if len(trail) > checkpoint:
+                if stats is not None:
+                    stats.add_backtrack(len(stack) - 1)
+                undo(values, trail, checkpoint)
+            digit = next(untried, None)
+            if digit is not None:
+                break
+            stack.pop()
+        else:
+            undo(values, trail, 0)
+            return SolveResult(UNSOLVABLE, None, nodes, 0)
+        trail.append((s, values[s]))
+        assign_value(values, s, digit)
+        changed = [s]
+
+def solve(grid, engine='string', propagation='sweep', backtracking='copy', recorder=None, stats=None, table=None,
+          strategies=None, branching=None, value_order=None, max_nodes=None, deadline=None):
     """
     Find the solution to a Sudoku grid.
     Args:
         grid(string): a string representing a sudoku grid.
             Example: '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+        engine(string): 'string' to solve on the dictionary of strings in this
+            module, 'bitmask' to use the integer mask engine in bitmask.py or
+            'dlx' to solve as an exact cover problem with dlx.py, or
+            'parallel' to split the bitmask search across a pool of processes
+            with parallel.py. The bitmask and parallel engines also solve
+            16x16 and 25x25 grids of 256 or 625 characters.
+        propagation(string): for the string engine, 'sweep' to repeat each
+            strategy over the whole board or 'worklist' to revisit only the
+            boxes and units affected by each change.
+        backtracking(string): for the string engine, 'copy' to copy the
+            puzzle for every guess, or 'trail' to search in place, undoing
+            failed guesses. Trail backtracking always uses worklist
+            propagation, and searches from an explicit stack with
+            search_budget unless a table is given. Copy backtracking, and
+            trail backtracking with a table, still recurse once per guess.
+        recorder(Recorder): for the string engine, an optional recorder.Recorder
+            that every change made while solving is recorded to, for replay
+            with visualize_assignments.
+        stats(SolveStats): for the string engine, an optional stats.SolveStats
+            filled in with strategy counters, search tree statistics and
+            timings for this solve.
+        table(TranspositionTable): for trail backtracking, an optional
+            transposition.TranspositionTable of states with no solution,
+            which is consulted and added to. Keep one across solves to skip
+            dead ends already explored by earlier searches.
+        strategies(list): for sweep propagation with copy backtracking, the
+            strategies reduce_puzzle applies in order, such as
+            strategies.ADVANCED. None for eliminate, only_choice and
+            naked_twins.
+        branching(function), value_order(function): for copy backtracking,
+            optional heuristics from heuristics.py choosing the placements
+            search branches on and the order they are tried in.
+        max_nodes(int), deadline(float): for the string engine, a budget of
+            search nodes and of seconds. If either is given the puzzle is
+            solved by search_budget, which searches in place with worklist
+            propagation whatever the backtracking, and a SolveResult is
+            returned instead.
     Returns:
         The dictionary representation of the final sudoku grid. False if no solution exists.
+        With a budget, a SolveResult whose status is SOLVED, UNSOLVABLE or
+        BUDGET_EXCEEDED, the last holding the most reduced state reached.
 
     Create new grid dictionary and solve
     """
+    if engine != 'string' and recorder is not None:
+        raise ValueError("Only the string engine can record assignments")
+    if engine != 'string' and stats is not None:
+        raise ValueError("Only the string engine can collect statistics")
+    budget = max_nodes is not None or deadline is not None
+    if engine != 'string' and budget:
+        raise ValueError("Only the string engine can solve within a budget")
+    if engine in engines:
+        return engines[engine](grid)
+    if engine != 'string':
+        raise ValueError("Unknown engine: %r" % engine)
+    if propagation not in ('sweep', 'worklist'):
+        raise ValueError("Unknown propagation: %r" % propagation)
+    if backtracking not in ('copy', 'trail'):
+        raise ValueError("Unknown backtracking: %r" % backtracking)
+    if table is not None and backtracking != 'trail':
+        raise ValueError("A transposition table needs trail backtracking")
+    if strategies is not None and (propagation != 'sweep' or backtracking != 'copy'):
+        raise ValueError("Strategies can only be chosen for sweep propagation with copy backtracking")
+    if (branching is not None or value_order is not None) and backtracking != 'copy':
+        raise ValueError("Search heuristics can only be chosen for copy backtracking")
+    if budget and (table is not None or strategies is not None or branching is not None or value_order is not None):
+        raise ValueError("A budgeted solve cannot use a table, strategies or search heuristics")
+    global active_recorder
+    start = time.perf_counter()
     new_grid = grid_values(grid)
-    new_grid = search(new_grid)
-    return new_grid
+    if recorder is not None:
+        recorder.start(new_grid)
+        active_recorder = recorder
+    try:
+        if budget:
+            stop = None if deadline is None else start + deadline
+            result = search_budget(new_grid, max_nodes, stop, stats)
+            return result._replace(seconds=time.perf_counter() - start)
+        if backtracking == 'trail' and table is None:
+            return search_budget(new_grid, stats=stats).values or False
+        if backtracking == 'trail':
+            return search_trail(new_grid, stats=stats, table=table)
+        return search(new_grid, propagation, stats=stats, strategies=strategies, branching=branching,
+                      value_order=value_order)
+    finally:
+        active_recorder = None
+        if stats is not None:
+            stats.finish(time.perf_counter() - start)
 
 if __name__ == '__main__':
     #Puzzle to solve
     diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
     
-    #Call to solve
-    (display(solve(diag_sudoku_grid)))
+    #Call to solve, recording the assignments made
+    assignments = Recorder()
+    (display(solve(diag_sudoku_grid, recorder=assignments)))
 
     #Visualise with pygame
     try:
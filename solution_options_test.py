@@ -0,0 +1,153 @@
+import benchmark
+import solution
+import transposition
+import solution_test
+import unittest
+
+
+class TestWorklistPropagation(solution_test.DiagonalPuzzle, unittest.TestCase):
+
+    def test_matches_sweep(self):
+        sweep = solution.reduce_puzzle(solution.grid_values(self.diagonal_grid))
+        worklist = solution.reduce_puzzle_worklist(solution.grid_values(self.diagonal_grid))
+        #The worklist applies the same strategies, so it reduces at least as far
+        for box in solution.boxes:
+            self.assertTrue(set(worklist[box]) <= set(sweep[box]))
+
+    def test_contradiction(self):
+        values = solution.grid_values('11' + '.' * 79)
+        self.assertFalse(solution.reduce_puzzle_worklist(values))
+
+    def test_changed_boxes_only(self):
+        values = solution.grid_values('.' * 81)
+        values['E5'] = self.solved_diag_sudoku['E5']
+        values = solution.reduce_puzzle_worklist(values, ['E5'])
+        for s in solution.peers['E5']:
+            self.assertNotIn(values['E5'], values[s])
+        self.assertEqual(values['A2'], '123456789')
+
+    def test_solve(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, propagation='worklist'), self.solved_diag_sudoku)
+
+
+class TestTrailSearch(solution_test.DiagonalPuzzle, unittest.TestCase):
+
+    def test_solve(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, backtracking='trail'), self.solved_diag_sudoku)
+
+    def test_undo(self):
+        values = solution.grid_values(self.diagonal_grid)
+        before = values.copy()
+        trail = []
+        solution.reduce_puzzle_worklist(values, trail=trail)
+        self.assertNotEqual(values, before)
+        self.assertEqual(solution.undo(values, trail, 0), before)
+        self.assertEqual(trail, [])
+
+    def test_unsolvable_restores_values(self):
+        #Two 1s on the main diagonal, only found once the diagonal is reduced
+        values = solution.grid_values('1' + '.' * 9 + '1' + '.' * 70)
+        before = values.copy()
+        self.assertFalse(solution.search_trail(values))
+        self.assertEqual(values, before)
+
+
+class TestTranspositionTable(solution_test.DiagonalPuzzle, unittest.TestCase):
+    unsolvable = benchmark.load_puzzles('unsolvable.txt')[0]
+
+    def test_update_key(self):
+        values = solution.grid_values(self.diagonal_grid)
+        key = transposition.state_key(values)
+        trail = []
+        solution.reduce_puzzle_worklist(values, trail=trail)
+        self.assertEqual(transposition.update_key(key, values, trail, 0), transposition.state_key(values))
+
+    def test_solve(self):
+        table = transposition.TranspositionTable()
+        self.assertEqual(solution.solve(self.diagonal_grid, backtracking='trail', table=table), self.solved_diag_sudoku)
+        self.assertRaises(ValueError, solution.solve, self.diagonal_grid, table=table)
+
+    def test_dead_states_pruned(self):
+        table = transposition.TranspositionTable()
+        self.assertFalse(solution.solve(self.unsolvable, backtracking='trail', table=table))
+        self.assertEqual(table.hits, 0)
+        self.assertFalse(solution.solve(self.unsolvable, backtracking='trail', table=table))
+        self.assertEqual(table.info()['hits'], 1)
+
+    def test_bounded(self):
+        table = transposition.TranspositionTable(maxsize=10)
+        solution.solve(self.unsolvable, backtracking='trail', table=table)
+        self.assertEqual(len(table), 10)
+
+
+class TestCountSolutions(solution_test.DiagonalPuzzle, unittest.TestCase):
+
+    def test_unique(self):
+        self.assertEqual(solution.count_solutions(self.diagonal_grid), 1)
+        self.assertTrue(solution.is_unique(self.diagonal_grid))
+
+    def test_unsolvable(self):
+        self.assertEqual(solution.count_solutions('11' + '.' * 79), 0)
+        self.assertFalse(solution.is_unique('11' + '.' * 79))
+
+    def test_limit(self):
+        #Clearing boxes from a solved grid can only add solutions
+        grid = ''.join(self.solved_diag_sudoku[box] for box in solution.boxes)
+        grid = '.' * 40 + grid[40:]
+        self.assertEqual(solution.count_solutions(grid, limit=3), 3)
+        self.assertFalse(solution.is_unique(grid))
+
+    def test_counts_every_solution(self):
+        grid = ''.join(self.solved_diag_sudoku[box] for box in solution.boxes)
+        #Each row then has one box for the 1 and one for the 2, and checking
+        #all 2**9 ways of placing them finds 4 that are valid
+        grid = grid.replace('1', '.').replace('2', '.')
+        self.assertEqual(solution.count_solutions(grid), 4)
+        self.assertEqual(solution.count_solutions(grid, limit=2), 2)
+
+
+class TestBudget(solution_test.DiagonalPuzzle, unittest.TestCase):
+    hard_grid = benchmark.load_puzzles('hard.txt')[0]
+
+    def test_solved(self):
+        result = solution.solve(self.diagonal_grid, max_nodes=100)
+        self.assertEqual(result.status, solution.SOLVED)
+        self.assertEqual(result.values, self.solved_diag_sudoku)
+
+    def test_matches_trail_search(self):
+        result = solution.solve(self.hard_grid, max_nodes=10000)
+        self.assertEqual(result.status, solution.SOLVED)
+        self.assertEqual(result.values, solution.search_trail(solution.grid_values(self.hard_grid)))
+        #Trail backtracking without a budget takes the same iterative search
+        self.assertEqual(solution.solve(self.hard_grid, backtracking='trail'), result.values)
+        self.assertFalse(solution.solve('11' + '.' * 79, backtracking='trail'))
+
+    def test_unsolvable(self):
+        result = solution.solve('11' + '.' * 79, deadline=1.0)
+        self.assertEqual(result.status, solution.UNSOLVABLE)
+        self.assertIsNone(result.values)
+
+    def test_node_limit(self):
+        result = solution.solve(self.hard_grid, max_nodes=3)
+        self.assertEqual(result.status, solution.BUDGET_EXCEEDED)
+        self.assertEqual(result.nodes, 3)
+        #The best state is reduced, with no solved box clashing with a peer
+        best = result.values
+        self.assertLess(sum(len(v) for v in best.values()), 81 * 9)
+        for box in solution.boxes:
+            if len(best[box]) == 1:
+                self.assertFalse(any(best[peer] == best[box] for peer in solution.peers[box]))
+
+    def test_deadline(self):
+        result = solution.solve(self.hard_grid, deadline=0)
+        self.assertEqual(result.status, solution.BUDGET_EXCEEDED)
+        self.assertEqual(result.nodes, 0)
+
+    def test_options(self):
+        with self.assertRaises(ValueError):
+            solution.solve(self.hard_grid, engine='bitmask', max_nodes=10)
+        with self.assertRaises(ValueError):
+            solution.solve(self.hard_grid, max_nodes=10, table=transposition.TranspositionTable())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -94,5 +94,12 @@ class TestDiagonalSudoku(unittest.TestCase):
     def test_solve(self):
         self.assertEqual(solution.solve(self.diagonal_grid), self.solved_diag_sudoku)
 
+
+class DiagonalPuzzle:
+    """The puzzle and solution of TestDiagonalSudoku, for the test cases of other modules to mix in."""
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+    solved_diag_sudoku = TestDiagonalSudoku.solved_diag_sudoku
+    solved_grid = ''.join(TestDiagonalSudoku.solved_diag_sudoku[box] for box in solution.boxes)
+
 if __name__ == '__main__':
     unittest.main()
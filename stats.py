@@ -0,0 +1,126 @@
+"""
+Per-solve instrumentation for the string engine.
+
+A SolveStats is passed to solve(grid, stats=...) and collects how much each
+strategy removed and how long it took, along with the shape of the search
+tree. Hooks can be added to forward each event to a metrics pipeline. When
+no SolveStats is passed none of this code runs.
+"""
+import time
+
+
+def count_candidates(values):
+    """The total number of possible values left across every box."""
+    return sum(len(value) for value in values.values())
+
+
+class SolveStats:
+    """
+    Counters and timings for one solve.
+    Args:
+        hooks: callables run as hook(event, details) for each event, where
+            event is 'strategy', 'pass', 'node', 'branch', 'backtrack' or
+            'solve' and details is a dictionary describing it.
+
+    Attributes:
+        removed: candidates removed by each strategy, keyed by name.
+        strategy_time: wall time in seconds spent in each strategy.
+        passes: the number of passes made by reduce_puzzle.
+        nodes: the number of search nodes visited.
+        backtracks: the number of guesses that led to no solution.
+        max_depth: the deepest level of the search reached.
+        branching: for each depth, the number of branch points and the total
+            number of choices at them, see branching_factor.
+        wall_time: the wall time in seconds of the whole solve.
+    """
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+        self.removed = {}
+        self.strategy_time = {}
+        self.passes = 0
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.branching = {}
+        self.wall_time = 0.0
+
+    def add_hook(self, hook):
+        """Call hook(event, details) for every future event."""
+        self.hooks.append(hook)
+
+    def emit(self, event, details):
+        """Pass an event to every hook."""
+        for hook in self.hooks:
+            hook(event, details)
+
+    def run_strategy(self, strategy, values, name=None):
+        """
+        Run a strategy on values, counting the candidates it removes and the
+        time it takes, and return what the strategy returned.
+        """
+        name = name or strategy.__name__
+        before = count_candidates(values)
+        start = time.perf_counter()
+        result = strategy(values)
+        elapsed = time.perf_counter() - start
+        #Strategies change values in place, so it holds what was removed even
+        #when the strategy returns False
+        self.add_strategy(name, before - count_candidates(values), elapsed)
+        return result
+
+    def add_strategy(self, name, removed, elapsed):
+        """Record candidates removed and time taken by one run of a strategy."""
+        self.removed[name] = self.removed.get(name, 0) + removed
+        self.strategy_time[name] = self.strategy_time.get(name, 0.0) + elapsed
+        if self.hooks:
+            self.emit('strategy', {'name': name, 'removed': removed, 'seconds': elapsed})
+
+    def add_pass(self):
+        """Record one pass of reduce_puzzle."""
+        self.passes += 1
+        if self.hooks:
+            self.emit('pass', {'passes': self.passes})
+
+    def add_node(self, depth):
+        """Record a search node at the given depth."""
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.hooks:
+            self.emit('node', {'depth': depth})
+
+    def add_branch(self, depth, choices):
+        """Record a branch point at the given depth with the number of choices tried there."""
+        points, total = self.branching.get(depth, (0, 0))
+        self.branching[depth] = (points + 1, total + choices)
+        if self.hooks:
+            self.emit('branch', {'depth': depth, 'choices': choices})
+
+    def add_backtrack(self, depth):
+        """Record a guess at the given depth that led to no solution."""
+        self.backtracks += 1
+        if self.hooks:
+            self.emit('backtrack', {'depth': depth})
+
+    def finish(self, elapsed):
+        """Record the wall time of the whole solve."""
+        self.wall_time = elapsed
+        if self.hooks:
+            self.emit('solve', self.as_dict())
+
+    def branching_factor(self):
+        """The mean number of choices at the branch points of each depth."""
+        return dict((depth, float(total) / points) for depth, (points, total) in sorted(self.branching.items()))
+
+    def as_dict(self):
+        """The statistics as a plain dictionary, for logging or JSON."""
+        return {
+            'removed': dict(self.removed),
+            'strategy_time': dict(self.strategy_time),
+            'passes': self.passes,
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'max_depth': self.max_depth,
+            'branching_factor': self.branching_factor(),
+            'wall_time': self.wall_time,
+        }
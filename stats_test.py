@@ -0,0 +1,46 @@
+import benchmark
+import solution
+import solution_test
+import stats
+import unittest
+
+
+class TestSolveStats(solution_test.DiagonalPuzzle, unittest.TestCase):
+    #Needs a guess to solve with every strategy
+    hard_grid = benchmark.load_puzzles('hard.txt')[0]
+
+    def test_sweep(self):
+        s = stats.SolveStats()
+        self.assertEqual(solution.solve(self.diagonal_grid, stats=s), self.solved_diag_sudoku)
+        self.assertEqual(set(s.removed), set(['eliminate', 'only_choice', 'naked_twins']))
+        #Every candidate beyond one per box was removed by some strategy
+        start = stats.count_candidates(solution.grid_values(self.diagonal_grid))
+        self.assertEqual(sum(s.removed.values()), start - 81)
+        self.assertGreater(s.passes, 0)
+        self.assertGreater(s.wall_time, 0)
+
+    def test_search_tree(self):
+        for options in ({}, {'propagation': 'worklist'}, {'backtracking': 'trail'}):
+            s = stats.SolveStats()
+            self.assertTrue(solution.solve(self.hard_grid, stats=s, **options))
+            self.assertGreater(s.nodes, 1)
+            self.assertGreater(s.max_depth, 0)
+            #Every node but the root is reached by one of the choices at a branch point
+            self.assertLessEqual(s.nodes - 1, sum(total for points, total in s.branching.values()))
+            for factor in s.branching_factor().values():
+                self.assertGreaterEqual(factor, 2)
+
+    def test_hooks(self):
+        events = []
+        s = stats.SolveStats(hooks=[lambda event, details: events.append(event)])
+        solution.solve(self.hard_grid, stats=s)
+        self.assertEqual(events.count('node'), s.nodes)
+        self.assertEqual(events.count('backtrack'), s.backtracks)
+        self.assertEqual(events[-1], 'solve')
+
+    def test_bitmask_cannot_collect(self):
+        with self.assertRaises(ValueError):
+            solution.solve(self.diagonal_grid, engine='bitmask', stats=stats.SolveStats())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,220 @@
+"""
+Higher order strategies for the string engine, pluggable into reduce_puzzle.
+
+Every strategy takes and returns a values dictionary like eliminate and
+only_choice in solution.py, so any list of them can be passed as
+reduce_puzzle(values, strategies=...) or solve(grid, strategies=...). They
+are tried in the order given, going back to the first after any progress,
+so put the cheapest first. eliminate is always run, first if the list
+leaves it out.
+
+Rather than comparing boxes pair by pair, each strategy reads a per-unit
+index built once per call by unit_index: for every unit the candidates of
+each of its boxes as a digit mask, and for every digit a mask of the
+positions in the unit where it is still possible. Subsets, intersections
+and X-wings then fall out of a few bitwise operations on those masks.
+"""
+from itertools import combinations
+
+from utils import *
+import solution
+
+digits = '123456789'
+
+#Digit masks of candidate strings, filled in as new strings are seen
+string_masks = {}
+
+def digit_mask(value):
+    """The digits of a candidate string as a 9-bit mask, bit d-1 for digit d."""
+    mask = string_masks.get(value)
+    if mask is None:
+        mask = 0
+        for d in value:
+            mask |= 1 << (int(d) - 1)
+        string_masks[value] = mask
+    return mask
+
+def bit_count(mask):
+    return bin(mask).count('1')
+
+def unit_index(values):
+    """
+    Index the candidates of every unit of unit_list.
+    Returns:
+        a list holding, for each unit, the digit mask of each of its boxes and
+        for each digit the mask of positions in the unit where it is possible.
+    """
+    index = []
+    for unit in unit_list:
+        box_masks = [digit_mask(values[box]) for box in unit]
+        places = [0] * 9
+        for position, mask in enumerate(box_masks):
+            while mask:
+                bit = mask & -mask
+                mask ^= bit
+                places[bit.bit_length() - 1] |= 1 << position
+        index.append((box_masks, places))
+    return index
+
+def keep_digits(values, box, mask):
+    """Remove every candidate of a box not in the digit mask."""
+    value = values[box]
+    new_value = ''.join(d for d in value if digit_mask(d) & mask)
+    if new_value != value:
+        solution.assign_value(values, box, new_value)
+
+def naked_subsets(values, size):
+    """
+    Find groups of size boxes within a unit whose candidates are drawn from
+    only size digits, and remove those digits from every peer the boxes
+    share. naked_subsets(values, 2) finds the same twins as naked_twins.
+
+    Only the unsolved boxes with at most size candidates are combined, and
+    each combination is checked with a single union of their digit masks.
+    """
+    for unit, (box_masks, places) in zip(unit_list, unit_index(values)):
+        small = [p for p, mask in enumerate(box_masks) if mask & (mask - 1) and bit_count(mask) <= size]
+        if len(small) < size:
+            continue
+        for group in combinations(small, size):
+            subset = 0
+            for p in group:
+                subset |= box_masks[p]
+            if bit_count(subset) != size:
+                continue
+            shared = set.intersection(*(peers[unit[p]] for p in group))
+            for box in shared:
+                keep_digits(values, box, ~subset)
+    return values
+
+def hidden_subsets(values, size):
+    """
+    Find groups of size digits that can only go in the same size boxes of a
+    unit, and remove every other candidate from those boxes.
+    """
+    for unit, (box_masks, places) in zip(unit_list, unit_index(values)):
+        open_digits = [d for d in range(9) if 1 < bit_count(places[d]) <= size]
+        if len(open_digits) < size:
+            continue
+        for group in combinations(open_digits, size):
+            positions = 0
+            subset = 0
+            for d in group:
+                positions |= places[d]
+                subset |= 1 << d
+            if bit_count(positions) != size:
+                continue
+            for p in range(9):
+                if positions >> p & 1:
+                    keep_digits(values, unit[p], subset)
+    return values
+
+def naked_pairs(values):
+    """naked_subsets for pairs of boxes."""
+    return naked_subsets(values, 2)
+
+def naked_triples(values):
+    """naked_subsets for triples of boxes."""
+    return naked_subsets(values, 3)
+
+def naked_quads(values):
+    """naked_subsets for quads of boxes."""
+    return naked_subsets(values, 4)
+
+def hidden_pairs(values):
+    """hidden_subsets for pairs of digits."""
+    return hidden_subsets(values, 2)
+
+def hidden_triples(values):
+    """hidden_subsets for triples of digits."""
+    return hidden_subsets(values, 3)
+
+def hidden_quads(values):
+    """hidden_subsets for quads of digits."""
+    return hidden_subsets(values, 4)
+
+def build_overlaps():
+    """
+    For each ordered pair of units sharing at least two boxes, list the index
+    of the first unit, the mask of its positions that lie in the second and
+    the boxes of the second outside the first. Squares overlap rows, columns
+    and the diagonals they sit on.
+    """
+    overlaps = []
+    for a, first in enumerate(unit_list):
+        for second in unit_list:
+            shared = set(first) & set(second)
+            if 2 <= len(shared) < len(first):
+                mask = sum(1 << p for p, box in enumerate(first) if box in shared)
+                overlaps.append((a, mask, [box for box in second if box not in shared]))
+    return overlaps
+
+overlaps = build_overlaps()
+
+def intersections(values):
+    """
+    Pointing and claiming: where a digit's places within a unit all lie in
+    the boxes it shares with another unit, the digit must go in one of those
+    boxes, so it is removed from the rest of the other unit. This covers a
+    square pointing along a row, column or diagonal, and a row, column or
+    diagonal claiming a digit within a square.
+    """
+    index = unit_index(values)
+    for a, shared, outside in overlaps:
+        places = index[a][1]
+        for d in range(9):
+            if places[d] and not places[d] & ~shared:
+                digit = digits[d]
+                for box in outside:
+                    if digit in values[box] and len(values[box]) > 1:
+                        solution.assign_value(values, box, values[box].replace(digit, ''))
+    return values
+
+#Indices into unit_list of the rows and of the columns, in board order
+row_ids = [unit_list.index(unit) for unit in row_units]
+column_ids = [unit_list.index(unit) for unit in column_units]
+
+def x_wing(values):
+    """
+    Where a digit has exactly two places in each of two rows, and they are
+    in the same two columns, the digit must take one corner of the rectangle
+    in each of those columns, so it is removed from the rest of both
+    columns. The same is then done with rows and columns swapped.
+    """
+    index = unit_index(values)
+    for lines, crossing in ((row_ids, column_ids), (column_ids, row_ids)):
+        for d in range(9):
+            seen = {}
+            for line, u in enumerate(lines):
+                places = index[u][1][d]
+                if bit_count(places) != 2:
+                    continue
+                if places not in seen:
+                    seen[places] = line
+                    continue
+                corners = (seen[places], line)
+                digit = digits[d]
+                for position in range(9):
+                    if places >> position & 1:
+                        for other, box in enumerate(unit_list[crossing[position]]):
+                            if other not in corners and digit in values[box] and len(values[box]) > 1:
+                                solution.assign_value(values, box, values[box].replace(digit, ''))
+    return values
+
+#The strategies by name, for picking an order from a configuration
+STRATEGIES = dict((f.__name__, f) for f in (
+    solution.eliminate, solution.only_choice, solution.naked_twins,
+    naked_pairs, naked_triples, naked_quads, hidden_pairs, hidden_triples, hidden_quads,
+    intersections, x_wing,
+))
+
+#Cheap strategies first, so the costly ones only run once the cheap ones
+#have nothing left to do
+ADVANCED = [
+    solution.eliminate, solution.only_choice, intersections, naked_pairs, hidden_pairs,
+    naked_triples, hidden_triples, x_wing, naked_quads, hidden_quads,
+]
+
+def by_name(names):
+    """The list of strategies for a list of names from STRATEGIES."""
+    return [STRATEGIES[name] for name in names]
@@ -0,0 +1,90 @@
+import solution
+import solution_test
+import strategies
+import unittest
+
+
+class TestSubsets(unittest.TestCase):
+
+    def test_naked_pairs_match_naked_twins(self):
+        for before, possible in ((solution_test.TestNakedTwins.before_naked_twins_1, solution_test.TestNakedTwins.possible_solutions_1),
+                                 (solution_test.TestNakedTwins.before_naked_twins_2, solution_test.TestNakedTwins.possible_solutions_2)):
+            self.assertIn(strategies.naked_pairs(dict(before)), possible)
+
+    def test_naked_triple(self):
+        values = solution.grid_values('.' * 81)
+        values.update(A1='12', A2='23', A3='13')
+        strategies.naked_triples(values)
+        self.assertEqual(values['A9'], '456789')
+        #Peers sharing the square lose the digits too
+        self.assertEqual(values['C3'], '456789')
+        self.assertEqual(values['A1'], '12')
+
+    def test_hidden_pair(self):
+        values = solution.grid_values('.' * 81)
+        for box in solution.row_units[0][2:]:
+            values[box] = '3456789'
+        strategies.hidden_pairs(values)
+        self.assertEqual((values['A1'], values['A2']), ('12', '12'))
+
+
+class TestIntersections(unittest.TestCase):
+
+    def test_pointing(self):
+        values = solution.grid_values('.' * 81)
+        for box in ('A3', 'B1', 'B2', 'B3', 'C1', 'C2', 'C3'):
+            values[box] = '23456789'
+        strategies.intersections(values)
+        self.assertEqual(values['A5'], '23456789')
+        self.assertEqual(values['B5'], '123456789')
+
+    def test_diagonal_claiming(self):
+        values = solution.grid_values('.' * 81)
+        for box in solution.diag_units[0][2:]:
+            values[box] = '23456789'
+        strategies.intersections(values)
+        #The 1 of the diagonal must be at A1 or B2, so not elsewhere in the square
+        self.assertEqual(values['C1'], '23456789')
+        self.assertEqual(values['A2'], '23456789')
+        self.assertEqual(values['A5'], '123456789')
+
+
+class TestXWing(unittest.TestCase):
+
+    def test_rows(self):
+        values = solution.grid_values('.' * 81)
+        for row in ('A', 'E'):
+            for column in '1345689':
+                values[row + column] = '23456789'
+        strategies.x_wing(values)
+        self.assertEqual(values['C2'], '23456789')
+        self.assertEqual(values['I7'], '23456789')
+        self.assertEqual(values['A2'], '123456789')
+        self.assertEqual(values['C3'], '123456789')
+
+
+class TestReduceWith(solution_test.DiagonalPuzzle, unittest.TestCase):
+
+    def test_solve(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, strategies=strategies.ADVANCED), self.solved_diag_sudoku)
+        names = ['eliminate', 'only_choice', 'intersections']
+        self.assertEqual(solution.solve(self.diagonal_grid, strategies=strategies.by_name(names)), self.solved_diag_sudoku)
+
+    def test_without_eliminate(self):
+        #Strategies that never remove solved digits from their peers used to
+        #leave a full grid with clashes that search took for a solution
+        for names in (['intersections'], ['only_choice'], ['x_wing', 'naked_pairs']):
+            self.assertEqual(solution.solve(self.diagonal_grid, strategies=strategies.by_name(names)),
+                             self.solved_diag_sudoku)
+
+    def test_contradiction(self):
+        self.assertFalse(solution.reduce_puzzle(solution.grid_values('11' + '.' * 79), strategies=strategies.ADVANCED))
+        self.assertFalse(solution.reduce_puzzle(solution.grid_values('11' + '.' * 79),
+                                                strategies=strategies.by_name(['only_choice'])))
+        self.assertTrue(solution.has_clash(solution.grid_values('11' + '.' * 79)))
+
+    def test_needs_sweep(self):
+        self.assertRaises(ValueError, solution.solve, self.diagonal_grid, propagation='worklist', strategies=strategies.ADVANCED)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Transposition table of candidate states known to have no solution.
+
+A state is the possible values of every box once the puzzle has been
+reduced, and is identified by a Zobrist key: the exclusive or of a random
+64-bit number for each (box, value) pair. When a box changes only its two
+numbers need to be swapped in and out, so search_trail can find the key of
+each node from its parent's key and the changes on the trail.
+
+Within one search tree every node differs from the nodes of other subtrees
+in the box its common ancestor branched on, so states only repeat between
+searches. Keeping one table across solves lets searches of the same or
+related puzzles, such as the checks made while generating puzzles, skip
+every state an earlier search already showed to be a dead end.
+"""
+import random
+from collections import OrderedDict
+
+from utils import boxes
+
+#The random number for each (box, value) pair, drawn the first time it is needed
+numbers = dict((box, {}) for box in boxes)
+rng = random.Random(0)
+
+def zobrist(box, value):
+    """The random number standing for a box holding a value."""
+    table = numbers[box]
+    if value not in table:
+        table[value] = rng.getrandbits(64)
+    return table[value]
+
+def state_key(values):
+    """The Zobrist key of a whole values dictionary."""
+    key = 0
+    for box in boxes:
+        key ^= zobrist(box, values[box])
+    return key
+
+def update_key(key, values, trail, start):
+    """
+    The key of values given the key it had when the trail was at length
+    start, swapping in the current value of each box changed since then.
+    """
+    seen = set()
+    for box, old in trail[start:]:
+        if box not in seen:
+            seen.add(box)
+            key ^= zobrist(box, old) ^ zobrist(box, values[box])
+    return key
+
+
+class TranspositionTable:
+    """
+    A bounded set of keys of states with no solution, dropping the least
+    recently used key once it holds maxsize of them.
+    Args:
+        maxsize(int): the number of states kept, each taking roughly 100
+            bytes.
+
+    Two different states could in principle share a 64-bit key, which would
+    wrongly prune a state with a solution, but the chance of it over m
+    lookups in a table of n states is only around n * m / 2**64.
+    """
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.keys = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def is_dead(self, key):
+        """Whether the state with this key is known to have no solution, counting hits and misses."""
+        if key in self.keys:
+            self.keys.move_to_end(key)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add_dead(self, key):
+        """Record that the state with this key has no solution."""
+        self.keys[key] = None
+        self.keys.move_to_end(key)
+        if len(self.keys) > self.maxsize:
+            self.keys.popitem(last=False)
+
+    def info(self):
+        """The table counters as a dictionary, with the hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.keys),
+            'maxsize': self.maxsize,
+            'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+        }
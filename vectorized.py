@@ -0,0 +1,193 @@
+"""
+NumPy batch engine, propagating constraints across thousands of puzzles at
+once.
+
+Puzzles are held as an (N, 81) array of the same 9-bit candidate masks used
+by bitmask.py. Eliminate and only choice are applied to every puzzle at
+once through precomputed unit index tables, and only the puzzles
+that stall go on to the per-puzzle bitmask search.
+
+NumPy is optional. Without it the tables are not built and solve_batch
+raises ImportError.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import bitmask
+
+#Status of each puzzle after propagate
+CONTRADICTION = -1
+STALLED = 0
+SOLVED = 1
+
+def build_tables():
+    """
+    Build the index tables used to gather unit members and units as arrays.
+
+    Boxes do not all belong to the same number of units, since boxes on the
+    diagonals belong to more of them, so the tables are padded with an index
+    one past the end that always gathers a zero.
+    """
+    global popcount, unit_table, box_unit_table, slot_table, digit_chars
+    popcount = np.array(bitmask.popcount, dtype=np.uint8)
+    unit_table = np.array(bitmask.unit_index, dtype=np.intp)
+    #For each box, the units it belongs to
+    box_units = [[u for u, unit in enumerate(bitmask.unit_index) if i in unit] for i in range(81)]
+    max_units = max(len(u) for u in box_units)
+    box_unit_table = np.array([u + [len(unit_table)] * (max_units - len(u)) for u in box_units], dtype=np.intp)
+    #For each box, the positions it holds in the flattened (units, 9) array
+    slots = [[u * 9 + unit.index(i) for u, unit in enumerate(bitmask.unit_index) if i in unit] for i in range(81)]
+    max_slots = max(len(s) for s in slots)
+    padding = unit_table.size
+    slot_table = np.array([s + [padding] * (max_slots - len(s)) for s in slots], dtype=np.intp)
+    #The character for each mask when converting back to grids
+    digit_chars = np.array([ord(d) if len(d) == 1 else ord('.') for d in bitmask.mask_digits], dtype=np.uint8)
+
+if np is not None:
+    build_tables()
+
+def require_numpy():
+    """Raise ImportError if numpy could not be imported."""
+    if np is None:
+        raise ImportError("The vectorized engine requires numpy")
+
+def grids_masks(grids):
+    """
+    Convert a list of 81 character grid strings into an (N, 81) array of masks.
+    Any character other than the digits 1-9 is an unknown box. Raises
+    ValueError if any grid is not 81 characters long.
+    """
+    require_numpy()
+    for grid in grids:
+        if len(grid) != 81:
+            raise ValueError("Expected an 81 character grid, got %d characters" % len(grid))
+    chars = np.frombuffer(''.join(grids).encode('ascii'), dtype=np.uint8).reshape(len(grids), 81)
+    return digits_masks(chars.astype(np.int16) - ord('0'))
+
+def digits_masks(digits):
+    """
+    Convert an (N, 81) array of digits into an array of masks, any value
+    other than 1-9 being an unknown box.
+    """
+    require_numpy()
+    digits = digits.astype(np.int16)
+    known = (digits >= 1) & (digits <= 9)
+    return np.where(known, np.left_shift(1, np.clip(digits - 1, 0, 8)), bitmask.ALL_DIGITS).astype(np.uint16)
+
+def masks_grids(masks):
+    """Convert an (N, 81) array of masks into grid strings, '.' for unsolved boxes."""
+    require_numpy()
+    chars = digit_chars[masks]
+    return [row.tobytes().decode('ascii') for row in chars]
+
+def pad(array):
+    """Append a column of zeros for the padding index in the tables to gather."""
+    return np.concatenate([array, np.zeros((len(array), 1), dtype=array.dtype)], axis=1)
+
+def accumulate(members):
+    """
+    Combine the masks of the members of each unit into the digits seen at least
+    once and the digits seen at least twice.
+    """
+    once = np.zeros(members.shape[:2], dtype=members.dtype)
+    twice = np.zeros_like(once)
+    for k in range(members.shape[2]):
+        twice |= once & members[:, :, k]
+        once |= members[:, :, k]
+    return once, twice
+
+def eliminate(masks):
+    """
+    Clear the digit of every solved box from its peers, for every puzzle at once.
+    Returns:
+        the new masks, and a boolean array marking the puzzles where two boxes
+        in a unit are solved with the same digit.
+
+    The solved digits of each unit are combined first, then each box clears
+    the digits taken in any of its units, which is far less to gather than
+    every peer of every box.
+    """
+    members = masks[:, unit_table]
+    taken, clash = accumulate(np.where(popcount[members] == 1, members, 0))
+    taken = np.bitwise_or.reduce(pad(taken)[:, box_unit_table], axis=2)
+    failed = (clash != 0).any(axis=1)
+    return np.where(popcount[masks] == 1, masks, masks & ~taken), failed
+
+def only_choice(masks):
+    """
+    Assign each digit with a single possible box in a unit to that box, for
+    every puzzle at once.
+    Returns:
+        the new masks, and a boolean array marking the puzzles where a digit
+        has no place left in a unit or a box is forced to hold two digits.
+    """
+    members = masks[:, unit_table]
+    once, twice = accumulate(members)
+    single = once & ~twice
+    hits = pad((members & single[:, :, None]).reshape(len(masks), -1))
+    forced = np.bitwise_or.reduce(hits[:, slot_table], axis=2)
+    failed = (once != bitmask.ALL_DIGITS).any(axis=1) | (popcount[forced] > 1).any(axis=1)
+    return np.where(forced != 0, forced, masks), failed
+
+def propagate(masks):
+    """
+    Repeat eliminate and only choice over a batch until every puzzle is solved,
+    stalled or shown to have no solution.
+    Args:
+        masks: an (N, 81) array of candidate masks, which is not changed.
+
+    Returns:
+        the propagated masks and an array holding the status of each puzzle,
+        one of SOLVED, STALLED or CONTRADICTION.
+
+    Only the puzzles that changed on the previous pass are worked on, so a
+    batch of mostly easy puzzles quickly shrinks to the few that need more.
+    """
+    require_numpy()
+    masks = masks.copy()
+    status = np.full(len(masks), STALLED, dtype=np.int8)
+    active = np.arange(len(masks))
+    while len(active):
+        before = masks[active]
+        after, clash = eliminate(before)
+        after, failed = only_choice(after)
+        failed |= clash | (after == 0).any(axis=1)
+        masks[active] = after
+        status[active[failed]] = CONTRADICTION
+        changed = (after != before).any(axis=1) & ~failed
+        active = active[changed]
+    unsolved = (popcount[masks] != 1).any(axis=1)
+    status[(status != CONTRADICTION) & ~unsolved] = SOLVED
+    return masks, status
+
+def solve_batch(grids):
+    """
+    Solve a list of 81 character grid strings.
+    Returns:
+        a list holding the solved 81 character grid for each puzzle, or None
+        where a puzzle has no solution.
+
+    Propagation runs over the whole batch at once, then each stalled puzzle is
+    finished by the bitmask engine's search.
+    """
+    require_numpy()
+    if not grids:
+        return []
+    return solve_masks(grids_masks(grids))
+
+def solve_masks(masks):
+    """
+    Solve an (N, 81) array of candidate masks as solve_batch does, returning
+    a list of solved 81 character grids, None where there is no solution.
+    """
+    masks, status = propagate(masks)
+    results = [None] * len(masks)
+    for i, grid in zip(np.flatnonzero(status == SOLVED), masks_grids(masks[status == SOLVED])):
+        results[i] = grid
+    for i in np.flatnonzero(status == STALLED):
+        solved = bitmask.search([int(m) for m in masks[i]])
+        if solved:
+            results[i] = ''.join(bitmask.mask_digits[m] for m in solved)
+    return results
@@ -0,0 +1,33 @@
+import solution_test
+import unittest
+import vectorized
+
+
+@unittest.skipIf(vectorized.np is None, "numpy is not installed")
+class TestVectorized(solution_test.DiagonalPuzzle, unittest.TestCase):
+
+    def test_round_trip(self):
+        masks = vectorized.grids_masks([self.diagonal_grid, self.solved_grid])
+        self.assertEqual(vectorized.masks_grids(masks), [self.diagonal_grid, self.solved_grid])
+
+    def test_propagate_status(self):
+        #A grid left with one box open is finished by propagation alone
+        one_open = '.' + self.solved_grid[1:]
+        masks, status = vectorized.propagate(vectorized.grids_masks([one_open, '11' + '.' * 79, '.' * 81]))
+        self.assertEqual(list(status), [vectorized.SOLVED, vectorized.CONTRADICTION, vectorized.STALLED])
+        self.assertEqual(vectorized.masks_grids(masks[:1]), [self.solved_grid])
+
+    def test_solve_batch(self):
+        grids = [self.diagonal_grid, '1' + '.' * 9 + '1' + '.' * 70, self.diagonal_grid]
+        self.assertEqual(vectorized.solve_batch(grids), [self.solved_grid, None, self.solved_grid])
+
+    def test_grid_length(self):
+        #Short and long grids would otherwise shift the boxes between puzzles
+        with self.assertRaises(ValueError):
+            vectorized.solve_batch([self.diagonal_grid[:-1], self.diagonal_grid + '.'])
+
+    def test_empty(self):
+        self.assertEqual(vectorized.solve_batch([]), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,17 +1,15 @@
 from PySudoku import play
+from recorder import solved_frames
 
-def visualize_assignments(assignments):
-    """ Visualizes the set of assignments created by the Sudoku AI"""
-    last_assignment = None
-    filtered_assignments = []
+def visualize_assignments(assignments, headless=False, output=None):
+    """ Visualizes the set of assignments created by the Sudoku AI
 
-    for i in range(len(assignments)):
-        if last_assignment:
-            last_assignment_items = [item for item in last_assignment.items() if len(item[1]) == 1]
-            current_assignment_items = [item for item in assignments[i].items() if len(item[1]) == 1]
-            shared_items = set(last_assignment_items) & set(current_assignment_items)
-            if len(shared_items) < len(current_assignment_items):
-                filtered_assignments.append(assignments[i])
-        last_assignment = assignments[i]
-
-    play(filtered_assignments)
+    Accepts either a recorder.Recorder passed to solve, whose deltas are
+    replayed into a frame each time a box is solved, or a sequence of puzzle
+    dictionaries, of which those solving a new box are shown.
+    headless and output are passed on to play, to draw without a window and
+    export the frames.
+    """
+    if hasattr(assignments, 'frames'):
+        return play(assignments.frames(copy=False), headless, output)
+    return play(solved_frames(assignments), headless, output)